@@ -0,0 +1,74 @@
+"""Brzina i tačnost analize termala nad dugim simuliranim letom.
+
+Pravi trasu od `--hours` sati na `--rate` Hz istim putem kao server
+(`SimulatedSource` -> `ClimbRateFilter` -> `TrackWriter`), pa meri vreme
+`flight_analysis.analyze_track()` i poredi pronađene termale sa
+segmentima penjanja iz simulacije.
+
+Primer:
+    python3 bench_analysis.py --hours 5 --rate 25
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import flight_analysis
+import flight_track
+from climb_filter import ClimbRateFilter
+from sensor_source import SimulatedSource
+
+
+def build_track(path, hours, rate, seed):
+    """Snimi simulirani let; vraća listu (start, kraj) simuliranih termala"""
+    source = SimulatedSource(seed=seed)
+    climb_filter = ClimbRateFilter()
+    writer = flight_track.TrackWriter(path, time.time(), fsync_interval=60)
+    thermals = []
+    for i in range(int(hours * 3600 * rate)):
+        sample = source._sample_at(i / rate)
+        altitude, vario, _ = climb_filter.update(sample.timestamp, sample.altitude)
+        writer.append(sample.timestamp, sample.pressure, sample.temperature, altitude, vario)
+        if source._segment_rate > 0 and (not thermals or thermals[-1][0] != source._segment_start):
+            thermals.append((source._segment_start, source._segment_end))
+    writer.close()
+    return thermals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=5)
+    parser.add_argument('--rate', type=float, default=25)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=flight_track.TRACK_EXTENSION)
+    os.close(fd)
+    try:
+        print(f"Building {args.hours} h track at {args.rate} Hz...")
+        simulated = build_track(path, args.hours, args.rate, args.seed)
+        size_mb = os.path.getsize(path) / 1e6
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = flight_analysis.analyze_track(path)
+            timings.append(time.perf_counter() - start)
+    finally:
+        os.remove(path)
+
+    # Simulirani termal je pronađen ako mu se sredina nalazi u nekom od detektovanih
+    found = sum(any(t["start"] <= (a + b) / 2 <= t["start"] + t["duration"]
+                    for t in result["thermals"]) for a, b in simulated)
+    print(f"{result['data_points']} records ({size_mb:.1f} MB)")
+    print(f"analysis: best {min(timings) * 1000:.1f} ms, worst {max(timings) * 1000:.1f} ms")
+    print(f"thermals: {result['thermal_count']} detected, {len(simulated)} simulated, "
+          f"{found} simulated found")
+    print(f"time in lift: {result['time_in_lift_percent']}%, "
+          f"avg climb {result['avg_thermal_climb']} m/s, gain {result['thermal_gain']} m")
+
+
+if __name__ == '__main__':
+    main()
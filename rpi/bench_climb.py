@@ -0,0 +1,130 @@
+"""Offline poređenje Kalman filtera sa starim algoritmom brzine penjanja.
+
+Stari algoritam (do uvođenja `ClimbRateFilter`) je držao poslednjih 5
+visina u listi, pretpostavljao razmak od 0.5 s i delio razliku prve i
+poslednje, dok je petlja zapravo radila na 2 s.
+
+Referentna brzina je prava brzina simulacije, a za replay log
+centrirani izvod sa prozorom od ±2 s (bez kašnjenja). Mere se:
+
+- rmse  - srednja kvadratna greška u odnosu na referencu (m/s)
+- noise - standardna devijacija razlike uzastopnih procena (m/s)
+- lag   - kašnjenje (s) koje maksimizuje korelaciju sa referencom
+- cost  - vreme obrade po merenju (µs)
+
+Primeri:
+    python3 bench_climb.py                       # 1 h simulacije na 25 Hz
+    python3 bench_climb.py --replay let.csv      # snimljeni log pritiska
+"""
+
+import argparse
+import math
+import time
+
+from climb_filter import ClimbRateFilter
+from sensor_source import ReplaySource, SimulatedSource, Sample, pressure_to_altitude
+
+
+def legacy_climb_rates(samples, loop_period=2.0):
+    """Stari algoritam, hranjen merenjima na razmaku `loop_period`"""
+    history = []
+    results = []
+    next_t = samples[0].timestamp
+    climb_rate = 0.0
+    for sample in samples:
+        if sample.timestamp >= next_t:
+            next_t += loop_period
+            history.append(sample.altitude)
+            if len(history) > 5:
+                history.pop(0)
+            if len(history) >= 2:
+                time_diff = 0.5 * (len(history) - 1)
+                climb_rate = (history[-1] - history[0]) / time_diff
+        results.append(climb_rate)
+    return results
+
+
+def kalman_climb_rates(samples):
+    climb_filter = ClimbRateFilter()
+    return [climb_filter.update(s.timestamp, s.altitude)[1] for s in samples]
+
+
+def simulated_samples(duration, rate, seed):
+    source = SimulatedSource(seed=seed)
+    samples = []
+    reference = []
+    h = 1e-3
+    for i in range(int(duration * rate)):
+        t = i / rate
+        # Prava brzina: izvod visine bez šuma (simulacija sme da ide samo unapred)
+        before = source.true_altitude(t - h)
+        reference.append((source.true_altitude(t) - before) / h)
+        samples.append(source._sample_at(t))
+    return samples, reference
+
+
+def replay_samples(path):
+    rows = ReplaySource._load(path)
+    samples = [Sample(t, p, temp, pressure_to_altitude(p)) for t, p, temp in rows]
+    reference = []
+    lo = hi = 0
+    for s in samples:
+        while samples[lo].timestamp < s.timestamp - 2.0:
+            lo += 1
+        while hi + 1 < len(samples) and samples[hi + 1].timestamp <= s.timestamp + 2.0:
+            hi += 1
+        dt = samples[hi].timestamp - samples[lo].timestamp
+        reference.append((samples[hi].altitude - samples[lo].altitude) / dt if dt > 0 else 0.0)
+    return samples, reference
+
+
+def _lag(estimate, reference, rate, max_lag=10.0):
+    """Pomak (s) estimate-a unazad koji daje najveću korelaciju"""
+    n = len(reference)
+    mean_r = sum(reference) / n
+    best_lag, best_corr = 0.0, -math.inf
+    step = max(1, int(rate / 10))  # rezolucija 0.1 s
+    for shift in range(0, int(max_lag * rate), step):
+        pairs = range(0, n - shift, 4)
+        corr = sum((estimate[i + shift]) * (reference[i] - mean_r) for i in pairs)
+        if corr > best_corr:
+            best_lag, best_corr = shift / rate, corr
+    return best_lag
+
+
+def evaluate(name, estimate, reference, rate, elapsed):
+    n = len(reference)
+    rmse = math.sqrt(sum((e - r) ** 2 for e, r in zip(estimate, reference)) / n)
+    diffs = [estimate[i + 1] - estimate[i] for i in range(n - 1)]
+    mean_d = sum(diffs) / len(diffs)
+    noise = math.sqrt(sum((d - mean_d) ** 2 for d in diffs) / len(diffs))
+    lag = _lag(estimate, reference, rate)
+    print(f"{name:<10} rmse={rmse:6.3f} m/s  noise={noise:6.3f} m/s  "
+          f"lag={lag:5.1f} s  cost={elapsed / n * 1e6:6.1f} µs/sample")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--replay', help="CSV log: timestamp,pressure,temperature")
+    parser.add_argument('--duration', type=float, default=3600, help="trajanje simulacije (s)")
+    parser.add_argument('--rate', type=float, default=25, help="frekvencija simulacije (Hz)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.replay:
+        samples, reference = replay_samples(args.replay)
+        span = samples[-1].timestamp - samples[0].timestamp
+        rate = (len(samples) - 1) / span if span > 0 else 1.0
+    else:
+        samples, reference = simulated_samples(args.duration, args.rate, args.seed)
+        rate = args.rate
+    print(f"{len(samples)} samples at {rate:.1f} Hz")
+
+    for name, algorithm in (("legacy", legacy_climb_rates), ("kalman", kalman_climb_rates)):
+        start = time.perf_counter()
+        estimate = algorithm(samples)
+        evaluate(name, estimate, reference, rate, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
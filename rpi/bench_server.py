@@ -0,0 +1,115 @@
+"""Load benchmark: kašnjenje od merenja do klijenta u zavisnosti od broja klijenata.
+
+Pokreće server sa simuliranim senzorom u zadatom režimu (`threading`,
+`gevent` ili `eventlet`), povezuje N Socket.IO klijenata prijavljenih na
+batch telemetriju i meri, za svaku primljenu poruku, koliko je prošlo od
+poslednjeg merenja u njoj do prijema. Kašnjenje uključuje čekanje na
+pražnjenje FIFO-a, pa je minimum reda FIFO_POLL_INTERVAL.
+
+Potreban je `python-socketio[client]` (websocket-client).
+
+Primer:
+    python3 bench_server.py --mode gevent --clients 1,5,10,25 --duration 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import socketio
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    k = min(len(values) - 1, max(0, round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def start_server(mode, port, rate):
+    env = dict(os.environ, VARIO_SENSOR='sim', VARIO_ASYNC_MODE=mode,
+               VARIO_PORT=str(port), VARIO_SAMPLE_HZ=str(rate),
+               VARIO_FLIGHTS_DIR=os.environ.get('VARIO_FLIGHTS_DIR', '/tmp/variometar_bench'))
+    server = subprocess.Popen([sys.executable, 'variometar_web.py'], env=env,
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        probe = socketio.Client()
+        try:
+            probe.connect(url, transports=['websocket'])
+            probe.disconnect()
+            return server, url
+        except socketio.exceptions.ConnectionError:
+            time.sleep(0.5)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+def run_clients(url, count, duration, frame_rate):
+    latencies = []
+    frames = [0]
+    lock = threading.Lock()
+    clients = []
+
+    def make_client():
+        client = socketio.Client()
+
+        @client.on('telemetry')
+        def on_telemetry(frame):
+            received = time.time() * 1000
+            last_sample = frame['t0'] + sum(frame['dt'])
+            with lock:
+                latencies.append(received - last_sample)
+                frames[0] += 1
+            return True  # ack
+
+        client.connect(url, transports=['websocket'])
+        client.emit('subscribe', {'rate': frame_rate, 'ack': True})
+        return client
+
+    for _ in range(count):
+        clients.append(make_client())
+    time.sleep(1.0)  # zagrevanje
+    with lock:
+        latencies.clear()
+        frames[0] = 0
+    time.sleep(duration)
+    with lock:
+        result = list(latencies), frames[0]
+    for client in clients:
+        client.disconnect()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', default='gevent', choices=('threading', 'gevent', 'eventlet'))
+    parser.add_argument('--clients', default='1,5,10,25', help="broj klijenata, lista")
+    parser.add_argument('--duration', type=float, default=10, help="sekundi merenja po koraku")
+    parser.add_argument('--frame-rate', type=float, default=5, help="poruka u sekundi po klijentu")
+    parser.add_argument('--sample-rate', type=float, default=25)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    server, url = start_server(args.mode, args.port, args.sample_rate)
+    try:
+        print(f"mode={args.mode} sample_rate={args.sample_rate} Hz frame_rate={args.frame_rate} Hz")
+        print(f"{'clients':>7} {'frames/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for count in (int(c) for c in args.clients.split(',')):
+            latencies, frames = run_clients(url, count, args.duration, args.frame_rate)
+            print(f"{count:>7} {frames / args.duration:>9.1f} "
+                  f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+                  f"{percentile(latencies, 99):>8.1f} {max(latencies, default=float('nan')):>8.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Kalman filter za visinu i brzinu penjanja.
+
+Model konstantnog ubrzanja: stanje je [visina, brzina, ubrzanje], a
+promena ubrzanja (jerk) je beli šum. Merenje je samo barometarska visina.
+Svaki korak je O(1) i koristi stvarne (monotone) timestamp-ove merenja,
+pa radi ispravno i kada se frekvencija merenja menja ili merenja kasne.
+"""
+
+# Posle ovolike pauze između merenja stanje se postavlja ispočetka
+MAX_GAP = 5.0
+
+
+class ClimbRateFilter:
+    """Procena visine (m), brzine penjanja (m/s) i ubrzanja (m/s²)"""
+
+    def __init__(self, altitude_noise=0.25, jerk_noise=1.5):
+        # Standardna devijacija šuma visine (m) i spektralna gustina jerk-a
+        self.r = altitude_noise ** 2
+        self.q = jerk_noise ** 2
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.P = None
+        self.last_timestamp = None
+
+    def update(self, timestamp, altitude):
+        """Dodaj merenje i vrati (visina, brzina, ubrzanje)"""
+        if self.x is None or timestamp - self.last_timestamp > MAX_GAP:
+            self.x = [altitude, 0.0, 0.0]
+            self.P = [[self.r, 0.0, 0.0], [0.0, 4.0, 0.0], [0.0, 0.0, 1.0]]
+            self.last_timestamp = timestamp
+            return tuple(self.x)
+
+        dt = timestamp - self.last_timestamp
+        if dt <= 0:
+            return tuple(self.x)
+        self.last_timestamp = timestamp
+
+        self._predict(dt)
+        self._correct(altitude)
+        return tuple(self.x)
+
+    def _predict(self, dt):
+        x, P, q = self.x, self.P, self.q
+        dt2 = dt * dt / 2
+
+        # x = F x
+        x[0] += x[1] * dt + x[2] * dt2
+        x[1] += x[2] * dt
+
+        # P = F P F' + Q
+        F = ((1.0, dt, dt2), (0.0, 1.0, dt), (0.0, 0.0, 1.0))
+        FP = [[sum(F[i][k] * P[k][j] for k in range(3)) for j in range(3)]
+              for i in range(3)]
+        FPFt = [[sum(FP[i][k] * F[j][k] for k in range(3)) for j in range(3)]
+                for i in range(3)]
+
+        dt3, dt4, dt5 = dt ** 3, dt ** 4, dt ** 5
+        Q = ((dt5 / 20, dt4 / 8, dt3 / 6),
+             (dt4 / 8, dt3 / 3, dt * dt / 2),
+             (dt3 / 6, dt * dt / 2, dt))
+        self.P = [[FPFt[i][j] + q * Q[i][j] for j in range(3)] for i in range(3)]
+
+    def _correct(self, altitude):
+        x, P = self.x, self.P
+
+        # H = [1, 0, 0], pa je inovacija skalar
+        s = P[0][0] + self.r
+        K = [P[0][0] / s, P[1][0] / s, P[2][0] / s]
+        y = altitude - x[0]
+        for i in range(3):
+            x[i] += K[i] * y
+
+        # P = (I - K H) P
+        row0 = P[0][:]
+        self.P = [[P[i][j] - K[i] * row0[j] for j in range(3)] for i in range(3)]
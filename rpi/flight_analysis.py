@@ -0,0 +1,209 @@
+"""Analiza snimljenog leta: termali, klizanja i raspodela brzine penjanja.
+
+Radi nad trasom (`flight_track.map_track()`) celim nizovima, bez petlje po
+zapisima, pa let od nekoliko sati na 25 Hz (stotine hiljada zapisa) traje
+desetine milisekundi.
+
+Postupak:
+
+1. Brzina penjanja se izravna kao razlika visine na krajevima prozora od
+   `SMOOTHING_WINDOW` sekundi oko svakog zapisa (kruženje u termalu i
+   turbulencija se tako uproseče, a rupe u trasi ne smetaju).
+2. Zapisi sa izravnatim variom iznad `CLIMB_THRESHOLD` su penjanje, ostali
+   klizanje; uzastopni zapisi iste vrste čine segment.
+3. Klizanja kraća od `MERGE_GAP` između dva penjanja se spajaju u jedan
+   termal (izlazak iz jezgra tokom kruženja).
+4. Penjanja duža od `MIN_THERMAL_DURATION` sa dobitkom većim od
+   `MIN_THERMAL_GAIN` su termali; sve ostalo je klizanje.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import flight_track
+
+SMOOTHING_WINDOW = 10.0      # s, prozor za izravnavanje varia
+CLIMB_THRESHOLD = 0.2        # m/s, izravnati vario iznad kojeg je penjanje
+MERGE_GAP = 20.0             # s, najduži prekid penjanja unutar jednog termala
+MIN_THERMAL_DURATION = 30.0  # s
+MIN_THERMAL_GAIN = 10.0      # m
+MAX_SAMPLE_GAP = 5.0         # s, duži razmak između zapisa se ne računa u vreme
+HISTOGRAM_BINS = (-5.0, 5.0, 0.5)  # m/s: od, do, širina; krajnje klase skupljaju ostatak
+
+
+def _runs(mask):
+    """Početni i krajnji (isključivo) indeksi nizova True vrednosti"""
+    import numpy as np
+
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def smoothed_vario(t, altitude, window=SMOOTHING_WINDOW):
+    """Vario iz razlike visine na krajevima prozora od `window` sekundi"""
+    import numpy as np
+
+    lo = np.searchsorted(t, t - window / 2, 'left')
+    hi = np.searchsorted(t, t + window / 2, 'right') - 1
+    span = t[hi] - t[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vario = (altitude[hi] - altitude[lo]) / span
+    return np.where(span > 0, vario, 0.0)
+
+
+def _segments(starts, ends, t, altitude, vario, dt_cum):
+    """Opis segmenata [starts[i], ends[i]) - sve kolone odjednom"""
+    import numpy as np
+
+    last = ends - 1
+    duration = dt_cum[last] - dt_cum[starts]
+    gain = altitude[last] - altitude[starts]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg = np.where(duration > 0, gain / duration, 0.0)
+    if len(starts):
+        # reduceat nad parovima (start, end) daje max svakog segmenta; `end`
+        # može biti jednak dužini niza, pa se dodaje jedan element na kraj
+        bounds = np.column_stack((starts, ends)).ravel()
+        peak = np.maximum.reduceat(np.append(vario, 0.0), bounds)[::2]
+    else:
+        peak = np.zeros(0)
+    return {
+        "start": t[starts],
+        "duration": duration,
+        "start_altitude": altitude[starts],
+        "gain": gain,
+        "avg": avg,
+        "peak": peak
+    }
+
+
+def analyze(records):
+    """Analiza niza zapisa trase; vraća dict spreman za JSON"""
+    import numpy as np
+
+    count = len(records)
+    t = np.asarray(records['offset_ms'], dtype=np.float64) / 1000.0
+    altitude = np.asarray(records['altitude'], dtype=np.float64)
+    result = {
+        "data_points": count,
+        "duration_seconds": float(t[-1] - t[0]) if count else 0.0,
+        "thermals": [],
+        "glides": []
+    }
+    if count < 2:
+        result.update(thermal_count=0, time_in_lift_seconds=0.0, time_in_lift_percent=0.0,
+                      thermal_gain=0.0, avg_thermal_climb=0.0, best_thermal=None,
+                      climb_histogram={"bin_edges": [], "seconds": []})
+        return result
+
+    # Vreme koje nosi svaki zapis (do sledećeg), bez velikih rupa u trasi
+    dt = np.diff(t, append=t[-1])
+    dt[dt > MAX_SAMPLE_GAP] = 0.0
+    # dt_cum[i] - vreme leta pre zapisa i (vreme od zapisa a do b je dt_cum[b] - dt_cum[a])
+    dt_cum = np.concatenate(([0.0], np.cumsum(dt)))[:count]
+
+    vario = smoothed_vario(t, altitude)
+    starts, ends = _runs(vario > CLIMB_THRESHOLD)
+
+    # Spoji penjanja razdvojena kratkim klizanjem
+    if len(starts) > 1:
+        gap = t[starts[1:]] - t[ends[:-1] - 1]
+        keep = gap > MERGE_GAP
+        starts = starts[np.concatenate(([True], keep))]
+        ends = ends[np.concatenate((keep, [True]))]
+
+    climbs = _segments(starts, ends, t, altitude, vario, dt_cum)
+    is_thermal = ((climbs["duration"] >= MIN_THERMAL_DURATION)
+                  & (climbs["gain"] >= MIN_THERMAL_GAIN))
+    thermal_starts, thermal_ends = starts[is_thermal], ends[is_thermal]
+    thermals = {key: values[is_thermal] for key, values in climbs.items()}
+
+    # Klizanja su sve između termala (uključujući kratka penjanja)
+    glide_starts = np.concatenate(([0], thermal_ends))
+    glide_ends = np.concatenate((thermal_starts, [count]))
+    nonempty = glide_ends > glide_starts
+    glides = _segments(glide_starts[nonempty], glide_ends[nonempty], t, altitude, vario, dt_cum)
+
+    # Vreme u dizanju po termalima i raspodela brzine penjanja (vremenski ponderisana)
+    time_in_lift = float(thermals["duration"].sum())
+    thermal_gain = float(thermals["gain"].sum())
+    flight_time = float(dt.sum())
+    low, high, width = HISTOGRAM_BINS
+    edges = np.arange(low, high + width / 2, width)
+    seconds, _ = np.histogram(np.clip(vario, low, high), bins=edges, weights=dt)
+
+    result["thermals"] = _rows(thermals)
+    result["glides"] = _rows(glides)
+    best = int(np.argmax(thermals["avg"])) if len(thermal_starts) else None
+    result.update(
+        thermal_count=int(len(thermal_starts)),
+        time_in_lift_seconds=round(time_in_lift, 1),
+        time_in_lift_percent=round(100 * time_in_lift / flight_time, 1) if flight_time else 0.0,
+        thermal_gain=round(thermal_gain, 1),
+        avg_thermal_climb=round(thermal_gain / time_in_lift, 2) if time_in_lift else 0.0,
+        best_thermal=result["thermals"][best] if best is not None else None,
+        climb_histogram={
+            "bin_edges": edges.round(2).tolist(),
+            "seconds": seconds.round(1).tolist()
+        }
+    )
+    return result
+
+
+def _rows(segments):
+    """Kolone segmenata -> lista dict-ova, zaokruženo za JSON"""
+    return [{
+        "start": round(start, 1),
+        "duration": round(duration, 1),
+        "start_altitude": round(start_altitude, 1),
+        "gain": round(gain, 1),
+        "avg_climb": round(avg, 2),
+        "peak_climb": round(peak, 2)
+    } for start, duration, start_altitude, gain, avg, peak in zip(
+        *(segments[key].tolist() for key in
+          ("start", "duration", "start_altitude", "gain", "avg", "peak")))]
+
+
+def analyze_track(path):
+    """Analiza `.trk` fajla"""
+    _, records = flight_track.map_track(path)
+    return analyze(records)
+
+
+class AnalysisCache:
+    """Poslednjih `maxsize` analiza, po putanji trase.
+
+    Ključ uključuje veličinu i vreme izmene fajla, pa se let koji je još u
+    toku (trasa raste) ili je popravljen posle pada analizira ponovo.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        info = os.stat(path)
+        key = (info.st_size, info.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+
+        result = analyze_track(path)
+        with self._lock:
+            self.misses += 1
+            self._entries[path] = (key, result)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def discard(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
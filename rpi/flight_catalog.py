@@ -0,0 +1,205 @@
+"""SQLite katalog snimljenih letova.
+
+Katalog drži statistike svih letova (isti sadržaj kao JSON fajlovi) i
+ažurira se pri čuvanju i brisanju leta, pa lista letova sa paginacijom,
+sortiranjem i filtriranjem po datumu ide jednim upitom umesto čitanjem
+direktorijuma i svakog JSON fajla posebno.
+
+U tabeli `track_summaries` su rezultati ponovne obrade trasa
+(`reprocess.py`), sa hešom sadržaja trase da se nepromenjeni letovi
+preskaču.
+
+U tabeli `file_hashes` su heševi sadržaja fajlova leta za sinhronizaciju
+sa aplikacijom (`flight_sync.py`), uz veličinu i vreme izmene fajlova po
+kojima se zna da li je heš još važeći.
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+CATALOG_FILENAME = 'catalog.sqlite3'
+
+SUMMARY_FIELDS = (
+    'start_time', 'end_time', 'duration_seconds', 'max_altitude',
+    'min_altitude', 'max_climb_rate', 'max_sink_rate', 'altitude_gain',
+    'avg_temperature', 'data_points'
+)
+SORT_FIELDS = ('start_time', 'duration_seconds', 'max_altitude',
+               'max_climb_rate', 'altitude_gain')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS flights (
+    filename TEXT PRIMARY KEY,
+    start_epoch REAL NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    duration_seconds REAL,
+    max_altitude REAL,
+    min_altitude REAL,
+    max_climb_rate REAL,
+    max_sink_rate REAL,
+    altitude_gain REAL,
+    avg_temperature REAL,
+    data_points INTEGER
+);
+CREATE INDEX IF NOT EXISTS flights_start_epoch ON flights (start_epoch);
+CREATE TABLE IF NOT EXISTS track_summaries (
+    filename TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    filename TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+'''
+
+
+def flight_record(stats, start_time, end_time):
+    """Sadržaj JSON fajla leta iz statistika (`vario_state.empty_flight_stats()`)"""
+    data_points = stats["data_points"]
+    avg_temp = stats["temp_sum"] / data_points if data_points > 0 else 0
+    min_altitude = stats["min_altitude"] if data_points > 0 else 0
+
+    # Sačuvaj samo korisne statistike
+    return {
+        'start_time': start_time.isoformat(),
+        'end_time': end_time.isoformat(),
+        'duration_seconds': (end_time - start_time).total_seconds(),
+        'max_altitude': round(stats["max_altitude"], 1),
+        'min_altitude': round(min_altitude, 1),
+        'max_climb_rate': round(stats["max_climb_rate"], 1),
+        'max_sink_rate': round(stats["max_sink_rate"], 1),
+        'altitude_gain': round(stats["max_altitude"] - min_altitude, 1),
+        'avg_temperature': round(avg_temp, 1),
+        'data_points': data_points
+    }
+
+
+class FlightCatalog:
+    """Indeks letova u `catalog.sqlite3` unutar direktorijuma letova"""
+
+    def __init__(self, flights_dir):
+        self.flights_dir = flights_dir
+        os.makedirs(flights_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(flights_dir, CATALOG_FILENAME),
+                                   check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+
+    def upsert(self, filename, record):
+        """Dodaj ili zameni let (record je sadržaj JSON fajla leta)"""
+        start_epoch = datetime.datetime.fromisoformat(record['start_time']).timestamp()
+        values = [filename, start_epoch] + [record.get(field) for field in SUMMARY_FIELDS]
+        placeholders = ', '.join('?' * len(values))
+        with self._lock, self._db:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO flights (filename, start_epoch, {', '.join(SUMMARY_FIELDS)}) "
+                f"VALUES ({placeholders})", values)
+
+    def delete(self, filename):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM flights WHERE filename = ?", (filename,))
+            self._db.execute("DELETE FROM track_summaries WHERE filename = ?", (filename,))
+            self._db.execute("DELETE FROM file_hashes WHERE filename = ?", (filename,))
+
+    def summary_hashes(self):
+        """{filename: heš trase} za letove koji imaju rezultat ponovne obrade"""
+        with self._lock:
+            return dict(self._db.execute("SELECT filename, content_hash FROM track_summaries"))
+
+    def store_summary(self, filename, content_hash, summary):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO track_summaries (filename, content_hash, summary) "
+                "VALUES (?, ?, ?)", (filename, content_hash, json.dumps(summary)))
+
+    def file_hashes(self):
+        """{filename: (stamp, heš)} sačuvanih heševa fajlova leta"""
+        with self._lock:
+            return {filename: (stamp, content_hash) for filename, stamp, content_hash
+                    in self._db.execute("SELECT filename, stamp, content_hash FROM file_hashes")}
+
+    def store_file_hash(self, filename, stamp, content_hash):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO file_hashes (filename, stamp, content_hash) "
+                "VALUES (?, ?, ?)", (filename, stamp, content_hash))
+
+    def filenames(self):
+        """Imena JSON fajlova svih letova, po vremenu starta"""
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT filename FROM flights ORDER BY start_epoch, filename")]
+
+    def summaries(self, date_from=None, date_to=None):
+        """Rezultati ponovne obrade letova u periodu, po vremenu starta"""
+        where = []
+        params = []
+        if date_from is not None:
+            where.append("f.start_epoch >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            where.append("f.start_epoch < ?")
+            params.append(date_to)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT s.filename, s.summary FROM track_summaries s "
+                f"JOIN flights f ON f.filename = s.filename {where_sql} "
+                f"ORDER BY f.start_epoch", params).fetchall()
+        return [dict(json.loads(summary), filename=filename) for filename, summary in rows]
+
+    def query(self, page=1, per_page=50, sort='start_time', order='desc',
+              date_from=None, date_to=None):
+        """Stranica letova i ukupan broj letova koji odgovaraju filteru.
+
+        `date_from`/`date_to` su unix vremena (s); `date_to` je isključiv.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field: {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"Unknown sort order: {order}")
+        sort_column = 'start_epoch' if sort == 'start_time' else sort
+
+        where = []
+        params = []
+        if date_from is not None:
+            where.append("start_epoch >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            where.append("start_epoch < ?")
+            params.append(date_to)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+
+        with self._lock:
+            total = self._db.execute(
+                f"SELECT COUNT(*) FROM flights {where_sql}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT filename, {', '.join(SUMMARY_FIELDS)} FROM flights {where_sql} "
+                f"ORDER BY {sort_column} {order.upper()}, filename LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page]).fetchall()
+        return total, [dict(row) for row in rows]
+
+    def sync(self):
+        """Uskladi katalog sa JSON fajlovima na disku (pri startu servera)"""
+        on_disk = {f for f in os.listdir(self.flights_dir) if f.endswith('.json')}
+        with self._lock:
+            indexed = {row[0] for row in self._db.execute("SELECT filename FROM flights")}
+
+        for filename in indexed - on_disk:
+            self.delete(filename)
+        for filename in on_disk - indexed:
+            try:
+                with open(os.path.join(self.flights_dir, filename)) as f:
+                    self.upsert(filename, json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error indexing flight {filename}: {e}")
+        return len(on_disk)
@@ -0,0 +1,160 @@
+"""Automatsko prepoznavanje poletanja i sletanja iz visine i varia.
+
+Variometar ima samo barometar, pa se let prepoznaje po promeni visine.
+Odluke koriste vario izravnat kliznim prosekom (`climb_tau`), da šum
+filtera na zemlji ne izgleda kao pokret:
+
+- na zemlji se prati referentna visina (sporo klizni prosek dok miruje, da
+  prati promenu vazdušnog pritiska tokom dana)
+- poletanje: visina se udaljila od reference više od `takeoff_altitude`,
+  ili je |vario| iznad `takeoff_climb` neprekidno `takeoff_time` sekundi
+  (start sa brda odmah ide u spuštanje ili termal)
+- sletanje: |vario| ispod `still_climb` i visina u pojasu `landing_band`
+  neprekidno `landing_time` sekundi (u letu se to ne dešava - i u
+  kruženju bez penjanja visina osciluje više od par metara)
+
+Posle `idle_after` sekundi mirovanja na zemlji detektor prijavljuje
+`idle`, pa server smanjuje frekvenciju merenja i slanja dok se nešto ne
+pomeri. Sva vremena su u vremenu izvora (timestamp-ovi merenja).
+"""
+
+import threading
+import time
+
+GROUND = 'ground'
+AIRBORNE = 'airborne'
+
+TAKEOFF = 'takeoff'
+LANDING = 'landing'
+
+
+class FlightDetector:
+    """Stanje zemlja/let; `update()` vraća TAKEOFF, LANDING ili None"""
+
+    def __init__(self, takeoff_altitude=15.0, takeoff_climb=1.0, takeoff_time=4.0,
+                 still_climb=0.3, landing_band=2.0, landing_time=45.0,
+                 idle_after=120.0, reference_tau=60.0, climb_tau=3.0):
+        self.takeoff_altitude = takeoff_altitude
+        self.takeoff_climb = takeoff_climb
+        self.takeoff_time = takeoff_time
+        self.still_climb = still_climb
+        self.landing_band = landing_band
+        self.landing_time = landing_time
+        self.idle_after = idle_after
+        self.reference_tau = reference_tau
+        self.climb_tau = climb_tau
+        self.reset()
+
+    def reset(self, state=GROUND):
+        self.state = state
+        self.reference = None
+        self.takeoff_timestamp = None
+        self.climb_rate = 0.0
+        self._last = None
+        self._moving_since = None
+        self._fast_since = None
+        self._last_motion = None
+        self._still_since = None
+        self._still_min = self._still_max = None
+
+    @property
+    def idle(self):
+        """Na zemlji i bez pomeranja duže od `idle_after`"""
+        return (self.state == GROUND and self._last is not None and self._last_motion is not None
+                and self._last - self._last_motion >= self.idle_after)
+
+    def update(self, timestamp, altitude, climb_rate):
+        previous, self._last = self._last, timestamp
+        if previous is not None:
+            alpha = min(1.0, (timestamp - previous) / self.climb_tau)
+            self.climb_rate += alpha * (climb_rate - self.climb_rate)
+        climb_rate = self.climb_rate
+        if self._last_motion is None:
+            self._last_motion = timestamp
+        if abs(climb_rate) > self.still_climb:
+            self._last_motion = timestamp
+
+        if self.state == GROUND:
+            return self._update_ground(timestamp, altitude, climb_rate, previous)
+        return self._update_airborne(timestamp, altitude, climb_rate)
+
+    def _update_ground(self, timestamp, altitude, climb_rate, previous):
+        moving = abs(climb_rate) > self.still_climb
+        if self.reference is None:
+            self.reference = altitude
+        elif not moving and previous is not None:
+            # Klizni prosek visine dok miruje (prati promenu pritiska)
+            alpha = min(1.0, (timestamp - previous) / self.reference_tau)
+            self.reference += alpha * (altitude - self.reference)
+
+        if moving:
+            if self._moving_since is None:
+                self._moving_since = timestamp
+        else:
+            self._moving_since = None
+        if abs(climb_rate) > self.takeoff_climb:
+            if self._fast_since is None:
+                self._fast_since = timestamp
+        else:
+            self._fast_since = None
+
+        left_ground = abs(altitude - self.reference) > self.takeoff_altitude
+        sustained = self._fast_since is not None and timestamp - self._fast_since >= self.takeoff_time
+        if not (left_ground or sustained):
+            return None
+
+        self.state = AIRBORNE
+        self.takeoff_timestamp = self._moving_since if self._moving_since is not None else timestamp
+        self._still_since = None
+        return TAKEOFF
+
+    def _update_airborne(self, timestamp, altitude, climb_rate):
+        if (self._still_since is None or abs(climb_rate) > self.still_climb
+                or max(self._still_max, altitude) - min(self._still_min, altitude) > self.landing_band):
+            self._still_since = timestamp
+            self._still_min = self._still_max = altitude
+            return None
+
+        self._still_min = min(self._still_min, altitude)
+        self._still_max = max(self._still_max, altitude)
+        if timestamp - self._still_since < self.landing_time:
+            return None
+
+        self.state = GROUND
+        self.reference = altitude
+        self._moving_since = self._fast_since = None
+        self._last_motion = self._still_since
+        return LANDING
+
+
+class ModeUsage:
+    """Vreme i CPU vreme procesa po režimu rada (npr. `active`/`idle`).
+
+    `switch(mode)` se poziva pri svakoj promeni (ili periodično sa istim
+    režimom); proteklo vreme od prethodnog poziva pripisuje se prethodnom
+    režimu. CPU vreme je `time.process_time()`, tj. ceo server.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.seconds = {}
+        self.cpu_seconds = {}
+        self._wall = time.monotonic()
+        self._cpu = time.process_time()
+        self._lock = threading.Lock()
+
+    def switch(self, mode):
+        with self._lock:
+            wall, cpu = time.monotonic(), time.process_time()
+            self.seconds[self.mode] = self.seconds.get(self.mode, 0.0) + wall - self._wall
+            self.cpu_seconds[self.mode] = self.cpu_seconds.get(self.mode, 0.0) + cpu - self._cpu
+            self._wall, self._cpu = wall, cpu
+            self.mode = mode
+
+    def as_dict(self):
+        self.switch(self.mode)
+        return {mode: {
+            "seconds": round(seconds, 1),
+            "cpu_seconds": round(self.cpu_seconds[mode], 2),
+            "cpu_percent": round(100 * self.cpu_seconds[mode] / seconds, 2) if seconds else 0.0
+        } for mode, seconds in self.seconds.items()}
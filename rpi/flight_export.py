@@ -0,0 +1,129 @@
+"""Izvoz leta u IGC, CSV i GPX, strimovanjem direktno iz trase.
+
+Svaki format je generator delova teksta koji čita `.trk` fajl redom
+(`flight_track.read_track()`), pa je memorija ista za let od 5 minuta i
+od 5 sati, a preuzimanje počinje odmah.
+
+Variometar nema GPS, pa su u IGC i GPX zapisima koordinate one koje se
+proslede (npr. poletište), a visina je barometarska:
+
+- IGC - jedan B zapis u sekundi (IGC vreme ima rezoluciju od 1 s), UTC,
+  pritisna visina po ISA (1013.25 hPa), GNSS visina 0 i fix `V`
+- CSV - sva merenja: vreme, pritisak, temperatura, visina, vario
+- GPX - sva merenja kao `trkpt`, sa `ele` i `time`; pritisak, temperatura
+  i vario su u `extensions`
+"""
+
+import datetime
+from xml.sax.saxutils import escape
+
+import flight_track
+from sensor_source import SEA_LEVEL_PRESSURE, pressure_to_altitude
+
+ROWS_PER_CHUNK = 2048
+GPX_NAMESPACE = 'http://www.topografix.com/GPX/1/1'
+VARIO_NAMESPACE = 'https://github.com/Zeka5/variometar'
+
+
+def _utc(epoch):
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc)
+
+
+def _chunked(lines):
+    """Spoji redove u delove od ROWS_PER_CHUNK redova"""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def _igc_coordinate(value, degree_digits, positive, negative):
+    """Koordinata u IGC obliku DDMMmmmN / DDDMMmmmE"""
+    hemisphere = positive if value >= 0 else negative
+    value = abs(value)
+    degrees = int(value)
+    minutes = round((value - degrees) * 60000)
+    if minutes == 60000:
+        degrees, minutes = degrees + 1, 0
+    return f"{degrees:0{degree_digits}d}{minutes:05d}{hemisphere}"
+
+
+def _igc_altitude(meters):
+    meters = max(min(round(meters), 99999), -9999)
+    return f"{meters:05d}" if meters >= 0 else f"-{-meters:04d}"
+
+
+def igc_lines(path, latitude=0.0, longitude=0.0, pilot='', glider=''):
+    """IGC fajl (CRLF redovi) iz trase"""
+    with open(path, 'rb') as f:
+        start_epoch = flight_track.read_header(f)
+    start = _utc(start_epoch)
+    position = (_igc_coordinate(latitude, 2, 'N', 'S')
+                + _igc_coordinate(longitude, 3, 'E', 'W'))
+
+    yield 'AXXXVARVariometar\r\n'
+    yield f'HFDTEDATE:{start:%d%m%y},01\r\n'
+    yield f'HFPLTPILOTINCHARGE:{pilot}\r\n'
+    yield f'HFGTYGLIDERTYPE:{glider}\r\n'
+    yield 'HFFTYFRTYPE:Variometar,Raspberry Pi 5\r\n'
+    yield 'HFPRSPRESSALTSENSOR:Bosch,BMP390,9000\r\n'
+    yield 'HFALPALTPRESSURE:ISA\r\n'
+    yield 'HFTZNTIMEZONE:0\r\n'
+    yield 'LXXXNo GPS: fixed position, pressure altitude only\r\n'
+
+    last_second = None
+    for _, (offset_ms, pressure, _, _, _) in flight_track.read_track(path):
+        epoch = start_epoch + offset_ms / 1000
+        second = int(epoch)
+        if second == last_second:
+            continue
+        last_second = second
+        altitude = pressure_to_altitude(pressure, SEA_LEVEL_PRESSURE)
+        yield f'B{_utc(second):%H%M%S}{position}V{_igc_altitude(altitude)}00000\r\n'
+
+
+def csv_lines(path):
+    """CSV sa svim merenjima; `time` je UTC ISO 8601 sa milisekundama"""
+    yield 'time,offset_s,pressure_hpa,temperature_c,altitude_m,vario_ms\n'
+    for start_epoch, (offset_ms, pressure, temperature, altitude, vario) in flight_track.read_track(path):
+        time = _utc(start_epoch + offset_ms / 1000).isoformat(timespec='milliseconds')
+        yield (f'{time},{offset_ms / 1000:.3f},{pressure:.2f},{temperature:.2f},'
+               f'{altitude:.2f},{vario:.2f}\n')
+
+
+def gpx_lines(path, latitude=0.0, longitude=0.0, name=''):
+    """GPX 1.1 sa jednom trasom"""
+    with open(path, 'rb') as f:
+        start_epoch = flight_track.read_header(f)
+
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield (f'<gpx version="1.1" creator="Variometar" xmlns="{GPX_NAMESPACE}" '
+           f'xmlns:vario="{VARIO_NAMESPACE}">\n')
+    yield f'<metadata><name>{escape(name)}</name><time>{_utc(start_epoch):%Y-%m-%dT%H:%M:%SZ}</time></metadata>\n'
+    yield f'<trk><name>{escape(name)}</name><trkseg>\n'
+    point = f'<trkpt lat="{latitude:.6f}" lon="{longitude:.6f}">'
+    for _, (offset_ms, pressure, temperature, altitude, vario) in flight_track.read_track(path):
+        time = _utc(start_epoch + offset_ms / 1000).isoformat(timespec='milliseconds')[:-6]
+        yield (f'{point}<ele>{altitude:.1f}</ele><time>{time}Z</time><extensions>'
+               f'<vario:pressure>{pressure:.2f}</vario:pressure>'
+               f'<vario:temperature>{temperature:.1f}</vario:temperature>'
+               f'<vario:vario>{vario:.2f}</vario:vario></extensions></trkpt>\n')
+    yield '</trkseg></trk>\n</gpx>\n'
+
+
+# format: (generator, mimetype, ekstenzija)
+FORMATS = {
+    'igc': (igc_lines, 'application/vnd.fai.igc', '.igc'),
+    'csv': (csv_lines, 'text/csv', '.csv'),
+    'gpx': (gpx_lines, 'application/gpx+xml', '.gpx')
+}
+
+
+def export(path, fmt, **options):
+    """Generator delova izvezenog fajla; `options` su parametri formata"""
+    lines, _, _ = FORMATS[fmt]
+    return _chunked(lines(path, **options))
@@ -0,0 +1,289 @@
+"""Sinhronizacija letova sa aplikacijom: samo novi i promenjeni, u jednom paketu.
+
+Hotspot je aktivan kratko, pa aplikacija ne preuzima let po let, nego:
+
+1. `POST /api/sync` sa `{"have": {filename: heš}}` - letovi koje aplikacija
+   već ima. Odgovor su letovi koji joj nedostaju ili su promenjeni (sa
+   hešom), letovi koje server više nema i id paketa.
+2. `GET /api/sync/<id>.tar.gz` - tar.gz sa `manifest.json` i, za svaki let,
+   JSON statistikama i `.trk` trasom. Odgovor podržava `Range`, pa se
+   prekinut prenos nastavlja od poslednjeg primljenog bajta (`If-Range` sa
+   ETag-om, koji je id paketa).
+
+Heš leta je SHA-1 sadržaja njegovih fajlova i čuva se u katalogu uz
+veličinu i vreme izmene fajlova, pa se arhiva ne čita ponovo pri svakoj
+sinhronizaciji. Id paketa je heš spiska (ime, heš) letova u njemu, a paket
+je determinističan (tar i gzip bez vremena), pa isti zahtev daje isti id i
+iste bajtove i posle restarta servera - nastavak prenosa važi i kada se
+paket ponovo napravi.
+
+Paket se pravi dok se šalje: fajlovi se čitaju sa diska deo po deo, a
+kompresovani bajtovi idu klijentu i u keš fajl (`.sync/`), pa prvi bajt
+stiže odmah, a memorija ne zavisi od broja letova. Nastavak (`Range`) se
+šalje iz keša; ako keš ne postoji (prvi prenos je prekinut pre kraja),
+paket se prvo napravi u keš.
+"""
+
+import collections
+import gzip
+import hashlib
+import json
+import os
+import re
+import tarfile
+import tempfile
+
+import flight_track
+
+BUNDLE_DIR = '.sync'        # poddirektorijum direktorijuma letova
+BUNDLE_EXTENSION = '.tar.gz'
+BUNDLE_FORMAT = 1
+MAX_BUNDLES = 4             # gotovih paketa na disku
+MAX_PLANS = 16              # zapamćenih planova (id -> letovi)
+HASH_CHUNK = 1024 * 1024
+READ_CHUNK = 64 * 1024      # deo fajla koji se čita, kompresuje i šalje odjednom
+COMPRESS_LEVEL = 6          # gzip: dobar odnos brzine i veličine na RPi-ju
+_BUNDLE_ID = re.compile(r'[0-9a-f]{40}')
+
+
+def flight_files(flights_dir, filename):
+    """Putanje fajlova leta: JSON statistike i trasa (ako postoji)"""
+    base, _ = os.path.splitext(filename)
+    paths = [os.path.join(flights_dir, filename)]
+    track_path = os.path.join(flights_dir, base + flight_track.TRACK_EXTENSION)
+    if os.path.exists(track_path):
+        paths.append(track_path)
+    return paths
+
+
+def _stamp(paths):
+    """Veličine i vremena izmene fajlova; promena znači da heš nije važeći"""
+    parts = []
+    for path in paths:
+        st = os.stat(path)
+        parts.append(f'{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns}')
+    return ';'.join(parts)
+
+
+def _bundle_id(entries):
+    payload = json.dumps([BUNDLE_FORMAT, sorted(entries)]).encode()
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _tar_header(name, size):
+    """USTAR zaglavlje člana bez vremena i vlasnika (determinističan paket)"""
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mode = 0o644
+    info.mtime = 0
+    return info.tobuf(tarfile.USTAR_FORMAT, 'utf-8', 'surrogateescape')
+
+
+def _tar_padding(size, block=tarfile.BLOCKSIZE):
+    return bytes(-size % block)
+
+
+class _Sink:
+    """Izlaz gzip-a: upisuje u keš fajl i čuva bajtove za slanje klijentu"""
+
+    def __init__(self, file):
+        self.file = file
+        self._pending = []
+
+    def write(self, data):
+        self.file.write(data)
+        self._pending.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._pending)
+        self._pending = []
+        return data
+
+
+class FlightSync:
+    """Planiranje i pravljenje paketa za sinhronizaciju.
+
+    `pause()` se poziva između delova posla koji čita ili kompresuje fajlove
+    (npr. `lambda: socketio.sleep(0)`), da pravljenje velikog paketa ne
+    zaustavi petlje servera.
+    """
+
+    def __init__(self, flights_dir, catalog, pause=lambda: None):
+        self.flights_dir = flights_dir
+        self.catalog = catalog
+        self.pause = pause
+        self.bundle_dir = os.path.join(flights_dir, BUNDLE_DIR)
+        self._plans = collections.OrderedDict()
+
+        # Ostaci paketa prekinutih pri pravljenju
+        if os.path.isdir(self.bundle_dir):
+            for name in os.listdir(self.bundle_dir):
+                if name.endswith('.tmp'):
+                    os.remove(os.path.join(self.bundle_dir, name))
+
+    def _hash_files(self, paths):
+        digest = hashlib.sha1()
+        for path in paths:
+            digest.update(os.path.basename(path).encode() + b'\0')
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                    digest.update(chunk)
+                    self.pause()
+        return digest.hexdigest()
+
+    def flight_hashes(self):
+        """{filename: heš} svih letova; zastareli heševi se ponovo računaju"""
+        known = self.catalog.file_hashes()
+        hashes = {}
+        for filename in self.catalog.filenames():
+            try:
+                paths = flight_files(self.flights_dir, filename)
+                stamp = _stamp(paths)
+                cached = known.get(filename)
+                if cached is not None and cached[0] == stamp:
+                    hashes[filename] = cached[1]
+                    continue
+                content_hash = self._hash_files(paths)
+            except OSError:
+                continue  # let je obrisan u međuvremenu
+            self.catalog.store_file_hash(filename, stamp, content_hash)
+            hashes[filename] = content_hash
+        return hashes
+
+    def plan(self, have):
+        """Šta aplikaciji treba, za `have` = {filename: heš} koje već ima.
+
+        Vraća (id paketa ili None ako nema šta da se pošalje,
+        [(filename, heš)] letova u paketu, imena letova kojih više nema).
+        """
+        hashes = self.flight_hashes()
+        entries = [(filename, content_hash) for filename, content_hash in hashes.items()
+                   if have.get(filename) != content_hash]
+        removed = sorted(set(have) - set(hashes))
+        if not entries:
+            return None, [], removed
+
+        bundle_id = _bundle_id(entries)
+        self._plans[bundle_id] = entries
+        self._plans.move_to_end(bundle_id)
+        while len(self._plans) > MAX_PLANS:
+            self._plans.popitem(last=False)
+        return bundle_id, entries, removed
+
+    def bundle_path(self, bundle_id):
+        return os.path.join(self.bundle_dir, bundle_id + BUNDLE_EXTENSION)
+
+    def cached(self, bundle_id):
+        """Putanja gotovog paketa u kešu, ili None"""
+        if not _BUNDLE_ID.fullmatch(bundle_id):
+            return None
+        path = self.bundle_path(bundle_id)
+        return path if os.path.exists(path) else None
+
+    def stream(self, bundle_id):
+        """Generator delova paketa (pravi ga i upisuje u keš dok se šalje).
+
+        None ako paket nije poznat (npr. posle restarta) - aplikacija tada
+        ponovo šalje `POST /api/sync` i dobija isti id ako se ništa nije
+        promenilo. ValueError ako su se letovi promenili posle planiranja.
+        """
+        if not _BUNDLE_ID.fullmatch(bundle_id):
+            return None
+        entries = self._plans.get(bundle_id)
+        if entries is None:
+            return None
+
+        hashes = self.flight_hashes()
+        for filename, content_hash in entries:
+            if hashes.get(filename) != content_hash:
+                self._plans.pop(bundle_id, None)
+                raise ValueError(f"Flight {filename} changed, sync again")
+        return self._stream(bundle_id, entries)
+
+    def build(self, bundle_id):
+        """Napravi paket u keš bez slanja; vraća putanju ili None ako nije poznat"""
+        chunks = self.stream(bundle_id)
+        if chunks is None:
+            return None
+        for _ in chunks:
+            pass
+        return self.bundle_path(bundle_id)
+
+    def _stream(self, bundle_id, entries):
+        os.makedirs(self.bundle_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.bundle_dir)
+        try:
+            with os.fdopen(fd, 'wb') as raw:
+                sink = _Sink(raw)
+                with gzip.GzipFile(filename='', mode='wb', fileobj=sink,
+                                   compresslevel=COMPRESS_LEVEL, mtime=0) as gz:
+                    for block in self._tar_blocks(bundle_id, entries):
+                        gz.write(block)
+                        data = sink.take()
+                        if data:
+                            yield data
+                        self.pause()
+                data = sink.take()
+                if data:
+                    yield data
+            os.replace(tmp_path, self.bundle_path(bundle_id))
+        except BaseException:
+            # I kada klijent prekine prenos (GeneratorExit): keš ima samo cele pakete
+            os.remove(tmp_path)
+            raise
+        self._prune()
+
+    def _tar_blocks(self, bundle_id, entries):
+        """Tar arhiva deo po deo: manifest, pa fajlovi letova direktno sa diska"""
+        flights = [(filename, content_hash, flight_files(self.flights_dir, filename))
+                   for filename, content_hash in entries]
+        manifest = {"bundle": bundle_id, "format": BUNDLE_FORMAT, "flights": [
+            {"filename": filename, "hash": content_hash,
+             "files": [os.path.basename(path) for path in paths]}
+            for filename, content_hash, paths in flights]}
+        data = json.dumps(manifest, indent=2).encode()
+        yield _tar_header('manifest.json', len(data)) + data + _tar_padding(len(data))
+
+        for filename, content_hash, paths in flights:
+            digest = hashlib.sha1()
+            try:
+                for path in paths:
+                    name = os.path.basename(path)
+                    digest.update(name.encode() + b'\0')
+                    with open(path, 'rb') as f:
+                        size = os.fstat(f.fileno()).st_size
+                        yield _tar_header(name, size)
+                        remaining = size
+                        while remaining:
+                            chunk = f.read(min(READ_CHUNK, remaining))
+                            if not chunk:
+                                raise ValueError(f"Flight {filename} changed, sync again")
+                            digest.update(chunk)
+                            remaining -= len(chunk)
+                            yield chunk
+                    yield _tar_padding(size)
+            except OSError:
+                self._plans.pop(bundle_id, None)
+                raise ValueError(f"Flight {filename} was deleted, sync again")
+            if digest.hexdigest() != content_hash:
+                # Već poslati bajtovi ne odgovaraju planu: prekid, klijent ponovo planira
+                self._plans.pop(bundle_id, None)
+                raise ValueError(f"Flight {filename} changed, sync again")
+
+        # Kraj arhive: dva prazna bloka
+        yield bytes(2 * tarfile.BLOCKSIZE)
+
+    def _prune(self):
+        """Zadrži samo MAX_BUNDLES najnovijih paketa"""
+        bundles = [os.path.join(self.bundle_dir, name) for name in os.listdir(self.bundle_dir)
+                   if name.endswith(BUNDLE_EXTENSION)]
+        bundles.sort(key=os.path.getmtime, reverse=True)
+        for path in bundles[MAX_BUNDLES:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,198 @@
+"""Binarni zapis pune trase leta.
+
+Fajl (`.trk`) je append-only: zaglavlje fiksne dužine, pa zapisi fiksne
+širine, po jedan za svako merenje tokom snimanja.
+
+    zaglavlje  <4sHHd   magic b'VTRK', verzija, veličina zapisa, start (unix s)
+    zapis      <Iffff   ms od starta, pritisak (hPa), temperatura (°C),
+                        filtrirana visina (m), vario (m/s)
+
+Zapis ima 20 bajtova, pa je let od 3 sata na 25 Hz oko 5.4 MB. Pošto su
+zapisi fiksne širine, posle pada struje dovoljno je odseći nekompletan
+poslednji zapis (`repair_track()`), a za čitanje se fajl može memorijski
+mapirati kao NumPy niz bez učitavanja (`map_track()`).
+"""
+
+import os
+import struct
+import threading
+import time
+
+from vario_state import add_to_flight_stats, empty_flight_stats
+
+MAGIC = b'VTRK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHd')
+RECORD = struct.Struct('<Iffff')
+
+TRACK_EXTENSION = '.trk'
+READ_CHUNK_RECORDS = 4096
+TRACK_COLUMNS = ('offset_ms', 'pressure', 'temperature', 'altitude', 'vario')
+
+
+class TrackWriter:
+    """Dodaje merenja na kraj `.trk` fajla, uz periodični fsync"""
+
+    def __init__(self, path, start_epoch, fsync_interval=5.0):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.records = 0
+        self._lock = threading.Lock()
+        self._base_timestamp = None
+        self._file = open(path, 'wb', buffering=64 * 1024)
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, start_epoch))
+        self._sync()
+
+    def append(self, timestamp, pressure, temperature, altitude, vario):
+        """Dodaj jedno merenje; `timestamp` je vreme izvora (monotono, s)"""
+        with self._lock:
+            if self._file is None:
+                return
+            if self._base_timestamp is None:
+                self._base_timestamp = timestamp
+            offset_ms = int(round((timestamp - self._base_timestamp) * 1000))
+            self._file.write(RECORD.pack(offset_ms, pressure, temperature, altitude, vario))
+            self.records += 1
+            if time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._sync()
+            self._file.close()
+            self._file = None
+
+
+def read_header(f):
+    """Pročitaj i proveri zaglavlje, vrati start (unix s)"""
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("Track file is too short")
+    magic, version, record_size, start_epoch = HEADER.unpack(data)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError(f"Unsupported track file (version {version})")
+    return start_epoch
+
+
+def read_track(path):
+    """Generator (start_epoch, zapis) po zapisima, čita fajl u blokovima"""
+    with open(path, 'rb') as f:
+        start_epoch = read_header(f)
+        chunk_size = RECORD.size * READ_CHUNK_RECORDS
+        while True:
+            chunk = f.read(chunk_size)
+            whole = len(chunk) - len(chunk) % RECORD.size
+            for record in RECORD.iter_unpack(chunk[:whole]):
+                yield start_epoch, record
+            if len(chunk) < chunk_size:
+                break
+
+
+def repair_track(path):
+    """Odseci nekompletan poslednji zapis (posle pada), vrati broj zapisa"""
+    size = os.path.getsize(path)
+    if size < HEADER.size:
+        raise ValueError("Track file is too short")
+    records, extra = divmod(size - HEADER.size, RECORD.size)
+    if extra:
+        with open(path, 'r+b') as f:
+            f.truncate(size - extra)
+            os.fsync(f.fileno())
+    return records
+
+
+def summarize_track(path):
+    """Statistike leta iz trase, u istom obliku kao za let u toku (vario_state.py)"""
+    stats = empty_flight_stats()
+    start_epoch = None
+    last_offset = 0
+    for start_epoch, (offset_ms, _, temperature, altitude, vario) in read_track(path):
+        add_to_flight_stats(stats, altitude, vario, temperature)
+        last_offset = offset_ms
+
+    if start_epoch is None:
+        with open(path, 'rb') as f:
+            start_epoch = read_header(f)
+    return stats, start_epoch, start_epoch + last_offset / 1000
+
+
+def track_dtype():
+    """NumPy dtype koji odgovara jednom zapisu"""
+    import numpy as np
+    return np.dtype([(name, '<u4' if name == 'offset_ms' else '<f4')
+                     for name in TRACK_COLUMNS])
+
+
+def map_track(path):
+    """Memorijski mapiraj trasu; vraća (start_epoch, structured niz zapisa).
+
+    Čitaju se samo stranice kojima se pristupi, pa je cena ista za let od
+    5 minuta i od 5 sati. Nekompletan poslednji zapis (let u toku) se
+    ignoriše.
+    """
+    import numpy as np
+
+    with open(path, 'rb') as f:
+        start_epoch = read_header(f)
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    if count == 0:
+        return start_epoch, np.zeros(0, dtype=track_dtype())
+    records = np.memmap(path, dtype=track_dtype(), mode='r',
+                        offset=HEADER.size, shape=(count,))
+    return start_epoch, records
+
+
+def _bisect_offset(records, offset_ms, right=False):
+    """Prvi zapis sa offset-om > (`right`) ili >= `offset_ms`.
+
+    Pretraga čita jedan po jedan zapis: `np.searchsorted` nad
+    `records['offset_ms']` bi prvo kopirao celu kolonu (strided pogled na
+    memmap), pa bi pročitao ceo fajl.
+    """
+    lo, hi = 0, len(records)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        offset = int(records[mid]['offset_ms'])
+        if offset < offset_ms or (right and offset == offset_ms):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def select_window(records, start=None, end=None):
+    """Zapisi između `start` i `end` sekundi od početka leta (binarna pretraga)"""
+    lo = 0 if start is None else _bisect_offset(records, start * 1000)
+    hi = len(records) if end is None else _bisect_offset(records, end * 1000, right=True)
+    return records[lo:hi]
+
+
+def downsample_minmax(records, points, channel='altitude'):
+    """Smanji broj zapisa na najviše `points`, čuvajući min i max kanala.
+
+    Zapisi se dele u `points // 2` jednakih grupa i iz svake se uzimaju
+    zapis sa minimumom i zapis sa maksimumom, pa vrhovi termala i dna
+    spuštanja ostaju vidljivi i pri velikom smanjenju.
+    """
+    import numpy as np
+
+    count = len(records)
+    buckets = max(points // 2, 1)
+    if count <= points or count <= 2:
+        return records
+
+    size = -(-count // buckets)  # ceil
+    buckets = -(-count // size)   # bez grupa koje su samo dopuna
+    values = np.asarray(records[channel], dtype=np.float32)
+    padded = np.pad(values, (0, size * buckets - count), mode='edge').reshape(buckets, size)
+    base = np.arange(buckets) * size
+    indices = np.concatenate((base + padded.argmin(axis=1), base + padded.argmax(axis=1)))
+    indices = np.unique(np.minimum(indices, count - 1))
+    return records[indices]
@@ -0,0 +1,87 @@
+"""Stanje servera za `/healthz` i `/readyz` i vremena pokretanja.
+
+Pilot uključuje variometar na poletištu, pa je bitno koliko prođe od
+uključivanja do prvog merenja. Vremena se mere na `CLOCK_BOOTTIME`
+(sekunde od uključivanja RPi-ja, isto što i `/proc/uptime`), pa
+obuhvataju i boot sistema, a ne samo pokretanje servera.
+"""
+
+import os
+import socket
+import time
+
+NET_DIR = '/sys/class/net'
+
+
+def uptime():
+    """Sekunde od uključivanja (bez Linux-a: monotono vreme)"""
+    try:
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+    except (AttributeError, OSError):
+        return time.monotonic()
+
+
+def process_start_uptime():
+    """Vreme od uključivanja kada je proces pokrenut, iz `/proc/self/stat`"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Posle "pid (ime)" polje 22 (starttime) je 20. po redu
+            fields = f.read().rsplit(')', 1)[1].split()
+        return int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return uptime()
+
+
+class BootTimeline:
+    """Trenuci pokretanja (npr. `imports`, `serving`, `first_sample`).
+
+    Svaki trenutak se beleži samo prvi put, kao vreme od uključivanja i od
+    starta procesa.
+    """
+
+    def __init__(self):
+        self.process_start = process_start_uptime()
+        self.milestones = {}
+
+    def mark(self, milestone):
+        if milestone not in self.milestones:
+            self.milestones[milestone] = uptime()
+
+    def as_dict(self):
+        return {
+            "process_start_uptime_s": round(self.process_start, 3),
+            "milestones": {milestone: {
+                "uptime_s": round(at, 3),
+                "since_process_start_s": round(at - self.process_start, 3)
+            } for milestone, at in self.milestones.items()}
+        }
+
+
+def _address_is_local(address):
+    """Da li je adresa dodeljena nekom interfejsu (bind uspeva samo tada)"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.bind((address, 0))
+        return True
+    except OSError:
+        return False
+
+
+def network_state(hotspot_address):
+    """Stanje mrežnih interfejsa i da li je hotspot adresa podignuta"""
+    interfaces = {}
+    try:
+        names = sorted(os.listdir(NET_DIR))
+    except OSError:
+        names = []
+    for name in names:
+        try:
+            with open(os.path.join(NET_DIR, name, 'operstate')) as f:
+                interfaces[name] = f.read().strip()
+        except OSError:
+            continue
+    return {
+        "interfaces": interfaces,
+        "hotspot_address": hotspot_address,
+        "hotspot_up": _address_is_local(hotspot_address)
+    }
@@ -0,0 +1,115 @@
+"""Istorija poslednjih merenja za klijente koji se povežu usred leta.
+
+`LiveHistory` čuva poslednjih `capacity` merenja u kolonama unapred
+alociranim pri startu (`array`), pa je memorija fiksna, a dodavanje
+merenja O(1) upis na mesto `seq % capacity`, bez alokacije u petlji
+senzora.
+
+Istorija se šalje u istom kompaktnom obliku kao batch telemetrija
+(`telemetry.frame_from_columns()`), uz `last_seq` - redni broj poslednjeg
+merenja koje istorija pokriva. Klijent nastavlja od `last_seq + 1`:
+
+- `history` pri povezivanju: poslednjih 10 minuta, proređeno na ~1 Hz
+- `subscribe` sa `since` (poslednji seq koji klijent ima): sva merenja
+  posle `since`, pa `telemetry` poruke bez rupa i duplikata
+- `GET /api/live/history?since=&stride=`
+
+`sensor_data` poruke imaju `seq`; klijent odbacuje one sa `seq <= last_seq`.
+Posle restarta servera seq kreće od 1, pa `since` veći od poslednjeg seq
+daje celu istoriju (klijent tada briše svoju).
+
+Piše samo senzor thread. Čitanje ne zaključava: pri upisu se prvo
+poništi `seq` mesta, pa upišu vrednosti, pa novi `seq`; čitač posle
+kopiranja vrednosti proverava `seq` i odbacuje mesta prepisana u
+međuvremenu (uvek najstarija).
+"""
+
+from array import array
+
+from telemetry import frame_from_columns
+
+
+class LiveHistory:
+    """Prsten poslednjih `capacity` merenja, indeksiran rednim brojem (seq >= 1)"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.last_seq = 0
+        self._seq = array('q', bytes(8 * capacity))  # 0 = prazno mesto
+        self._timestamp = array('d', bytes(8 * capacity))
+        self._altitude = array('f', bytes(4 * capacity))
+        self._climb_rate = array('f', bytes(4 * capacity))
+        self._pressure = array('f', bytes(4 * capacity))
+        self._temperature = array('f', bytes(4 * capacity))
+
+    def append(self, seq, timestamp, altitude, climb_rate, pressure, temperature):
+        i = seq % self.capacity
+        self._seq[i] = 0
+        self._timestamp[i] = timestamp
+        self._altitude[i] = altitude
+        self._climb_rate[i] = climb_rate
+        self._pressure[i] = pressure
+        self._temperature[i] = temperature
+        self._seq[i] = seq
+        self.last_seq = seq
+
+    def _slices(self, first, count, stride):
+        """Indeksi `count` mesta od seq `first` sa korakom `stride` (najviše jedan prelom)"""
+        start = first % self.capacity
+        before_wrap = min(count, (self.capacity - 1 - start) // stride + 1)
+        slices = [slice(start, start + (before_wrap - 1) * stride + 1, stride)]
+        if before_wrap < count:
+            start = start + before_wrap * stride - self.capacity
+            slices.append(slice(start, start + (count - before_wrap - 1) * stride + 1, stride))
+        return slices
+
+    def columns(self, after, until=None, stride=1):
+        """Merenja sa seq u (after, until] deljivim sa `stride`, kao kolone.
+
+        Vraća (seq, timestamp, altitude, climb_rate, pressure, temperature)
+        liste; merenja starija od prstena se izostavljaju.
+        """
+        until = self.last_seq if until is None else min(until, self.last_seq)
+        first = max(after + 1, until - self.capacity + 1, 1)
+        first += -first % stride
+        if first > until:
+            return ([],) * 6
+        count = (until - first) // stride + 1
+
+        slices = self._slices(first, count, stride)
+        columns = [[] for _ in range(6)]
+        for s in slices:
+            for column, source in zip(columns[1:], (self._timestamp, self._altitude, self._climb_rate,
+                                                    self._pressure, self._temperature)):
+                column.extend(source[s])
+        # seq se čita poslednji: mesto prepisano tokom kopiranja ima drugi seq
+        for s in slices:
+            columns[0].extend(self._seq[s])
+
+        valid = 0
+        while valid < count and columns[0][valid] != first + valid * stride:
+            valid += 1
+        end = valid
+        while end < count and columns[0][end] == first + end * stride:
+            end += 1
+        return tuple(column[valid:end] for column in columns)
+
+    def frame(self, after, epoch_of, until=None, stride=1):
+        """Istorija kao telemetrijska poruka, sa `last_seq` i brojem izostavljenih merenja"""
+        until = self.last_seq if until is None else min(until, self.last_seq)
+        if after > until:
+            after = 0  # klijent pamti seq od pre restarta servera
+        after = max(after, 0)  # npr. `until - capacity` dok prsten nije pun
+        seq, timestamp, altitude, climb_rate, pressure, temperature = self.columns(after, until, stride)
+        first_wanted = after + 1 + (-(after + 1) % stride)
+        dropped = max(0, (seq[0] if seq else until + 1) - first_wanted) // stride
+        frame = frame_from_columns(
+            seq[0] if seq else until + 1, stride,
+            [round(epoch_of(t) * 1000) for t in timestamp],
+            [round(a * 100) for a in altitude],
+            [round(v * 100) for v in climb_rate],
+            [round(p * 100) for p in pressure],
+            [round(t * 10) for t in temperature],
+            dropped)
+        frame["last_seq"] = until
+        return frame
@@ -0,0 +1,190 @@
+"""Brojači, histogrami kašnjenja i sampling profiler za server.
+
+Metrike se izlažu na `/metrics` u Prometheus tekstualnom formatu, bez
+dodatnih paketa. Merenje na vrućoj putanji je jedan `time.perf_counter()`
+par i jedna pretraga granice u histogramu; metrike se ažuriraju bez
+zaključavanja (piše ih uglavnom jedan thread, a izgubljeno povećanje pri
+retkom istovremenom pisanju nije bitno za statistiku).
+
+`StackSampler` je profiler za dublju analizu: dok radi, iz posebnog
+(pravog) OS thread-a periodično uzima stek svih thread-ova i broji
+ponavljanja, pa je cena proporcionalna frekvenciji uzorkovanja, a ne
+broju poziva funkcija. Rezultat je u "collapsed stack" formatu koji
+`flamegraph.pl` i speedscope čitaju direktno.
+"""
+
+import _thread
+import bisect
+import collections
+import os
+import sys
+import time
+
+# Granice histograma u sekundama: od 50 µs (I2C burst) do 5 s (zaglavljena petlja)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+class Counter:
+    """Vrednost koja samo raste; `read` čita brojač koji vodi neko drugi"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=None, read=None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.read = read
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield self.name, self.labels, self.read() if self.read is not None else self.value
+
+
+class Gauge:
+    """Trenutna vrednost, čita se funkcijom u trenutku izvoza"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, read, labels=None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.read = read
+
+    def samples(self):
+        yield self.name, self.labels, self.read()
+
+
+class Histogram:
+    """Raspodela trajanja u sekundama (kumulativne klase kao u Prometheus-u)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+
+    def samples(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield f'{self.name}_bucket', dict(self.labels, le=repr(bound)), total
+        total += self.counts[-1]
+        yield f'{self.name}_bucket', dict(self.labels, le='+Inf'), total
+        yield f'{self.name}_sum', self.labels, self.sum
+        yield f'{self.name}_count', self.labels, total
+
+
+class Registry:
+    """Skup metrika; više metrika istog imena se razlikuje po labelama"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, read=None, **labels):
+        return self.add(Counter(name, help, labels, read))
+
+    def gauge(self, name, help, read, **labels):
+        return self.add(Gauge(name, help, read, labels))
+
+    def histogram(self, name, help, **labels):
+        return self.add(Histogram(name, help, labels))
+
+    def render(self):
+        """Sve metrike u Prometheus tekstualnom formatu (verzija 0.0.4)"""
+        by_name = collections.OrderedDict()
+        for metric in self._metrics:
+            by_name.setdefault(metric.name, []).append(metric)
+
+        lines = []
+        for name, metrics in by_name.items():
+            lines.append(f'# HELP {name} {metrics[0].help}')
+            lines.append(f'# TYPE {name} {metrics[0].kind}')
+            for metric in metrics:
+                for sample_name, labels, value in metric.samples():
+                    lines.append(f'{sample_name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _native_thread_functions():
+    """Pokretanje pravog OS thread-a i sleep, i kada su gevent/eventlet
+    zamenili thread-ove greenlet-ima"""
+    if 'gevent' in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            return (monkey.get_original('_thread', 'start_new_thread'),
+                    monkey.get_original('time', 'sleep'))
+    if 'eventlet' in sys.modules:
+        import eventlet.patcher
+        if eventlet.patcher.is_monkey_patched('thread'):
+            return (eventlet.patcher.original('_thread').start_new_thread,
+                    eventlet.patcher.original('time').sleep)
+    return _thread.start_new_thread, time.sleep
+
+
+class StackSampler:
+    """Sampling profiler: broji stekove svih thread-ova tokom `seconds`.
+
+    Sa gevent/eventlet svi greenlet-i rade u jednom OS thread-u, pa se
+    uzorkuje greenlet koji se u tom trenutku izvršava - upravo ono što
+    troši CPU.
+    """
+
+    def __init__(self, seconds, interval=0.005):
+        self.seconds = seconds
+        self.interval = interval
+        self.samples = 0
+        self.stacks = collections.Counter()
+        self.done = False
+        self._start_thread, self._sleep = _native_thread_functions()
+
+    def start(self):
+        self._start_thread(self._run, ())
+        return self
+
+    def _run(self):
+        # Sopstveni thread se prepoznaje po kodu, jer gevent menja i get_ident()
+        own_code = StackSampler._run.__code__
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline:
+            for frame in sys._current_frames().values():
+                if frame.f_code is not own_code:
+                    self.stacks[self._collapse(frame)] += 1
+            self.samples += 1
+            self._sleep(self.interval)
+        self.done = True
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def collapsed(self):
+        """Rezultat kao redovi `stek broj`, najčešći prvi"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
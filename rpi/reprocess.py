@@ -0,0 +1,290 @@
+"""Ponovna obrada svih snimljenih letova i statistike sezone.
+
+Statistike leta se računaju pri sletanju, pa posle promene algoritma
+brzine penjanja (`ClimbRateFilter`) ili analize termala stare vrednosti
+više ne važe. Ovaj posao za svaku trasu iz sirovog pritiska ponovo
+računa visinu i vario trenutnim filterom, pa statistike leta (JSON fajl i
+katalog) i analizu termala.
+
+- Trase se obrađuju paralelno u `ProcessPoolExecutor`-u (filter je čist
+  Python, pa je posao vezan za CPU i skalira se sa brojem jezgara).
+- Za svaki let se pamti heš sadržaja trase i verzije algoritma
+  (`algorithm_fingerprint()`); nepromenjeni letovi se preskaču.
+- `season_stats()` od sačuvanih rezultata pravi zbir za period: ukupno
+  vreme leta, najbolji termali, raspodela vremena po visini.
+
+Primeri:
+    python3 reprocess.py /home/milaogi/flights
+    python3 reprocess.py ~/klub/flights --workers 8 --year 2025
+    python3 reprocess.py ~/klub/flights --force
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pytz
+
+import flight_analysis
+import flight_track
+from climb_filter import ClimbRateFilter
+from flight_catalog import FlightCatalog, flight_record
+from sensor_source import pressure_to_altitude
+
+# Povećati kada se promeni obrada koja nije obuhvaćena parametrima ispod
+REPROCESS_VERSION = 1
+ALTITUDE_BIN = 100.0  # m, razmak klasa raspodele vremena po visini
+TOP_THERMALS = 10
+HASH_CHUNK = 1024 * 1024
+BELGRADE_TZ = pytz.timezone('Europe/Belgrade')
+
+
+def algorithm_fingerprint():
+    """Verzija obrade: menja se sa parametrima filtera i analize termala"""
+    climb_filter = ClimbRateFilter()
+    params = (REPROCESS_VERSION, climb_filter.r, climb_filter.q, ALTITUDE_BIN,
+              flight_analysis.SMOOTHING_WINDOW, flight_analysis.CLIMB_THRESHOLD,
+              flight_analysis.MERGE_GAP, flight_analysis.MIN_THERMAL_DURATION,
+              flight_analysis.MIN_THERMAL_GAIN, flight_analysis.HISTOGRAM_BINS)
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:12]
+
+
+def content_hash(path, fingerprint):
+    """Heš sadržaja trase i verzije obrade"""
+    digest = hashlib.sha1(fingerprint.encode())
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def reprocess_track(path):
+    """Ponovo izračunaj visinu, vario, statistike i analizu jedne trase.
+
+    Radi u posebnom procesu; vraća (start_epoch, end_epoch, stats, summary).
+    """
+    import numpy as np
+
+    start_epoch, mapped = flight_track.map_track(path)
+    records = np.array(mapped)  # kopija, kolone altitude/vario se menjaju
+    t = records['offset_ms'] / 1000.0
+
+    climb_filter = ClimbRateFilter()
+    raw_altitude = pressure_to_altitude(records['pressure'].astype(np.float64))
+    altitude = np.empty(len(records))
+    vario = np.empty(len(records))
+    update = climb_filter.update
+    for i, (timestamp, alt) in enumerate(zip(t.tolist(), raw_altitude.tolist())):
+        altitude[i], vario[i], _ = update(timestamp, alt)
+    records['altitude'] = altitude
+    records['vario'] = vario
+
+    count = len(records)
+    stats = {
+        "max_altitude": float(altitude.max()) if count else 0,
+        "min_altitude": float(altitude.min()) if count else float('inf'),
+        "max_climb_rate": max(float(vario.max()), 0) if count else 0,
+        "max_sink_rate": min(float(vario.min()), 0) if count else 0,
+        "data_points": count,
+        "temp_sum": float(records['temperature'].sum(dtype=np.float64))
+    }
+    end_epoch = start_epoch + (float(t[-1]) if count else 0.0)
+
+    analysis = flight_analysis.analyze(records)
+    summary = {
+        "airtime_seconds": analysis["duration_seconds"],
+        "max_altitude": round(stats["max_altitude"], 1),
+        "max_climb_rate": round(stats["max_climb_rate"], 1),
+        "thermal_count": analysis["thermal_count"],
+        "thermal_gain": analysis["thermal_gain"],
+        "time_in_lift_seconds": analysis["time_in_lift_seconds"],
+        "best_thermals": sorted(analysis["thermals"], key=lambda th: th["avg_climb"],
+                                reverse=True)[:TOP_THERMALS],
+        "climb_histogram": analysis["climb_histogram"],
+        "altitude_seconds": _altitude_histogram(altitude, t)
+    }
+    return start_epoch, end_epoch, stats, summary
+
+
+def _altitude_histogram(altitude, t):
+    """{donja granica klase (m): sekunde} - vreme provedeno po visini"""
+    import numpy as np
+
+    if len(altitude) < 2:
+        return {}
+    dt = np.diff(t, append=t[-1])
+    dt[dt > flight_analysis.MAX_SAMPLE_GAP] = 0.0
+    bins = np.floor(altitude / ALTITUDE_BIN).astype(np.int64)
+    lowest = int(bins.min())
+    seconds = np.bincount(bins - lowest, weights=dt)
+    return {str(int((lowest + i) * ALTITUDE_BIN)): round(float(s), 1)
+            for i, s in enumerate(seconds) if s > 0}
+
+
+def reprocess_archive(flights_dir, workers=None, force=False, exclude=(), progress=None):
+    """Ponovo obradi sve trase u direktorijumu; vraća izveštaj (dict).
+
+    `exclude` su imena trasa koje se preskaču (npr. let koji se upravo
+    snima), a `progress(done, total)` se poziva posle svakog leta.
+    """
+    catalog = FlightCatalog(flights_dir)
+    fingerprint = algorithm_fingerprint()
+    known = {} if force else catalog.summary_hashes()
+
+    pending = {}
+    skipped = 0
+    for name in sorted(os.listdir(flights_dir)):
+        if not name.endswith(flight_track.TRACK_EXTENSION) or name in exclude:
+            continue
+        path = os.path.join(flights_dir, name)
+        json_filename = name[:-len(flight_track.TRACK_EXTENSION)] + '.json'
+        digest = content_hash(path, fingerprint)
+        if known.get(json_filename) == digest:
+            skipped += 1
+        else:
+            pending[path] = (json_filename, digest)
+
+    started = time.perf_counter()
+    processed = 0
+    errors = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(reprocess_track, path): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                json_filename, digest = pending[path]
+                try:
+                    start_epoch, end_epoch, stats, summary = future.result()
+                    _save(catalog, flights_dir, json_filename, start_epoch, end_epoch, stats)
+                    catalog.store_summary(json_filename, digest, summary)
+                    processed += 1
+                except Exception as e:
+                    errors.append({"filename": json_filename, "error": str(e)})
+                if progress is not None:
+                    progress(processed + len(errors), len(pending))
+
+    return {
+        "fingerprint": fingerprint,
+        "processed": processed,
+        "skipped": skipped,
+        "errors": errors,
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def _save(catalog, flights_dir, json_filename, start_epoch, end_epoch, stats):
+    """Zameni statistike u JSON fajlu leta i katalogu, uz postojeće vreme leta"""
+    flight_path = os.path.join(flights_dir, json_filename)
+    start_time = datetime.datetime.fromtimestamp(start_epoch, BELGRADE_TZ)
+    end_time = datetime.datetime.fromtimestamp(end_epoch, BELGRADE_TZ)
+    if os.path.exists(flight_path):
+        with open(flight_path) as f:
+            old = json.load(f)
+        start_time = datetime.datetime.fromisoformat(old['start_time'])
+        end_time = datetime.datetime.fromisoformat(old['end_time'])
+
+    record = flight_record(stats, start_time, end_time)
+    tmp_path = flight_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, flight_path)
+    catalog.upsert(json_filename, record)
+
+
+def season_stats(catalog, date_from=None, date_to=None):
+    """Zbir rezultata ponovne obrade za letove u periodu"""
+    summaries = catalog.summaries(date_from, date_to)
+
+    best_thermals = []
+    altitude_seconds = {}
+    climb_seconds = None
+    climb_edges = []
+    highest = None
+    for summary in summaries:
+        for thermal in summary["best_thermals"]:
+            best_thermals.append(dict(thermal, filename=summary["filename"]))
+        for altitude, seconds in summary["altitude_seconds"].items():
+            altitude_seconds[int(altitude)] = altitude_seconds.get(int(altitude), 0.0) + seconds
+        histogram = summary["climb_histogram"]
+        if histogram["seconds"]:
+            if climb_seconds is None:
+                climb_edges = histogram["bin_edges"]
+                climb_seconds = [0.0] * len(histogram["seconds"])
+            climb_seconds = [a + b for a, b in zip(climb_seconds, histogram["seconds"])]
+        if highest is None or summary["max_altitude"] > highest["max_altitude"]:
+            highest = summary
+
+    best_thermals.sort(key=lambda th: th["avg_climb"], reverse=True)
+    airtime = sum(s["airtime_seconds"] for s in summaries)
+    lift = sum(s["time_in_lift_seconds"] for s in summaries)
+    gain = sum(s["thermal_gain"] for s in summaries)
+    return {
+        "flights": len(summaries),
+        "total_airtime_seconds": round(airtime, 1),
+        "time_in_lift_seconds": round(lift, 1),
+        "thermal_count": sum(s["thermal_count"] for s in summaries),
+        "thermal_gain": round(gain, 1),
+        "avg_thermal_climb": round(gain / lift, 2) if lift else 0.0,
+        "max_altitude": highest["max_altitude"] if highest else 0,
+        "max_altitude_flight": highest["filename"] if highest else None,
+        "best_climb_rate": max((s["max_climb_rate"] for s in summaries), default=0),
+        "best_thermals": best_thermals[:TOP_THERMALS],
+        "altitude_distribution": {
+            "bin_size": ALTITUDE_BIN,
+            "altitudes": sorted(altitude_seconds),
+            "seconds": [round(altitude_seconds[a], 1) for a in sorted(altitude_seconds)]
+        },
+        "climb_histogram": {"bin_edges": climb_edges, "seconds": [round(s, 1) for s in climb_seconds or []]}
+    }
+
+
+def year_range(year):
+    """Unix vremena početka godine i sledeće godine (Beogradsko vreme)"""
+    start = BELGRADE_TZ.localize(datetime.datetime(year, 1, 1)).timestamp()
+    end = BELGRADE_TZ.localize(datetime.datetime(year + 1, 1, 1)).timestamp()
+    return start, end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('flights_dir', nargs='?',
+                        default=os.environ.get('VARIO_FLIGHTS_DIR', '/home/milaogi/flights'))
+    parser.add_argument('--workers', type=int, default=None, help="broj procesa (podrazumevano broj jezgara)")
+    parser.add_argument('--force', action='store_true', help="obradi i nepromenjene letove")
+    parser.add_argument('--year', type=int, help="sezona za statistike (podrazumevano sve)")
+    parser.add_argument('--exclude', action='append', default=[], help="trasa koja se preskače (može više puta)")
+    parser.add_argument('--json', action='store_true', help="ispiši izveštaj kao JSON")
+    args = parser.parse_args()
+
+    def progress(done, total):
+        if not args.json:
+            print(f"\r{done}/{total}", end='', flush=True)
+
+    report = reprocess_archive(args.flights_dir, args.workers, args.force,
+                               args.exclude, progress)
+    date_from, date_to = year_range(args.year) if args.year else (None, None)
+    season = season_stats(FlightCatalog(args.flights_dir), date_from, date_to)
+
+    if args.json:
+        print(json.dumps({"report": report, "season": season}, indent=2))
+        return
+    print(f"\r{report['processed']} reprocessed, {report['skipped']} unchanged, "
+          f"{len(report['errors'])} errors in {report['seconds']} s")
+    for error in report['errors']:
+        print(f"  Error reprocessing {error['filename']}: {error['error']}")
+    print(f"{season['flights']} flights, {season['total_airtime_seconds'] / 3600:.1f} h airtime, "
+          f"{season['thermal_count']} thermals, avg climb {season['avg_thermal_climb']} m/s, "
+          f"max altitude {season['max_altitude']} m")
+    for thermal in season['best_thermals'][:5]:
+        print(f"  {thermal['avg_climb']:5.2f} m/s  {thermal['gain']:7.1f} m  {thermal['filename']}")
+
+
+if __name__ == '__main__':
+    main()
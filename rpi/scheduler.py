@@ -0,0 +1,96 @@
+"""Periodične petlje sa apsolutnim rokovima, bez drift-a.
+
+Petlja oblika "uradi posao, pa `sleep(period)`" ima stvarni period
+`period + trajanje posla` i tokom leta se pomera. `DeadlineScheduler`
+umesto toga računa rokove unapred (`start + n * period`) na
+`time.monotonic_ns()` i spava samo do sledećeg roka, pa se kašnjenje
+jednog prolaza ne prenosi na sledeće.
+
+Za svaki prolaz se meri jitter (koliko je petlja kasnila u odnosu na rok),
+a prolaz koji je kasnio ceo period ili više se broji kao overrun; propušteni
+rokovi se preskaču umesto da se sustižu naletom prolaza.
+"""
+
+import time
+from collections import deque
+
+JITTER_WINDOW = 1000  # poslednjih prolaza za percentile
+
+
+class DeadlineScheduler:
+    """Rokovi na svakih `period` sekundi stvarnog vremena.
+
+    `sleep(seconds)` je funkcija spavanja petlje (npr. `socketio.sleep`,
+    da bi radilo i sa gevent/eventlet).
+
+        scheduler = DeadlineScheduler(0.2, socketio.sleep)
+        while True:
+            scheduler.wait()
+            ...
+    """
+
+    def __init__(self, period, sleep=time.sleep):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.period_ns = round(period * 1e9)
+        self.sleep = sleep
+        self.deadline = None
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.max_jitter_ns = 0
+        self.last_jitter_ns = 0
+        self._jitter_total_ns = 0
+        self._jitter = deque(maxlen=JITTER_WINDOW)
+
+    def set_period(self, period):
+        """Promeni period; važi od sledećeg roka"""
+        self.period_ns = round(period * 1e9)
+
+    def wait(self):
+        """Sačekaj sledeći rok; vraća `time.monotonic_ns()` početka prolaza"""
+        now = time.monotonic_ns()
+        if self.deadline is None:
+            self.deadline = now
+        else:
+            self.deadline += self.period_ns
+            remaining = self.deadline - now
+            if remaining > 0:
+                self.sleep(remaining / 1e9)
+                now = time.monotonic_ns()
+
+        late = now - self.deadline
+        if late >= self.period_ns:
+            # Prethodni prolaz je trajao duže od perioda: preskoči propuštene rokove
+            missed = late // self.period_ns
+            self.overruns += 1
+            self.skipped += missed
+            self.deadline += missed * self.period_ns
+            late -= missed * self.period_ns
+
+        self.ticks += 1
+        self.last_jitter_ns = late
+        self._jitter.append(late)
+        self._jitter_total_ns += late
+        self.max_jitter_ns = max(self.max_jitter_ns, late)
+        return now
+
+    def as_dict(self):
+        recent = sorted(self._jitter)
+
+        def percentile(p):
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, round(p / 100 * (len(recent) - 1)))] / 1e6
+
+        avg = self._jitter_total_ns / self.ticks if self.ticks else 0.0
+        return {
+            "period_ms": self.period_ns / 1e6,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped_deadlines": self.skipped,
+            "jitter_avg_ms": round(avg / 1e6, 3),
+            "jitter_p50_ms": round(percentile(50), 3),
+            "jitter_p99_ms": round(percentile(99), 3),
+            "jitter_max_ms": round(self.max_jitter_ns / 1e6, 3)
+        }
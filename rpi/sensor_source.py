@@ -0,0 +1,486 @@
+"""Izvori podataka za barometarski senzor.
+
+Server ne zavisi direktno od Adafruit drajvera nego od izvora sa istim
+interfejsom, pa može da radi i bez Raspberry Pi-ja:
+
+- `read()`            - jedno merenje (`Sample`)
+- `configure(rate)`   - kontinualno merenje zadatom frekvencijom (Hz)
+- `read_batch()`      - sva merenja od prethodnog poziva
+- `sleep(seconds)`    - spavanje u vremenu izvora (uzima u obzir ubrzanje)
+- `speedup`           - koliko puta vreme izvora teče brže od stvarnog
+
+Izvori:
+
+- `BMP390Source`   - pravi senzor na I2C magistrali
+- `SimulatedSource` - sintetički termali i spuštanje
+- `ReplaySource`   - reprodukcija snimljenog loga pritiska
+
+Izbor izvora se radi preko promenljivih okruženja, vidi `create_source()`.
+"""
+
+import csv
+import math
+import os
+import random
+import time
+from collections import namedtuple
+
+import flight_track
+
+SEA_LEVEL_PRESSURE = 1013.25
+DEFAULT_SAMPLE_RATE = 25.0
+
+# Jedno merenje: monotoni timestamp (s), pritisak (hPa), temperatura (°C)
+# i visina (m) izvedena iz tog istog pritiska
+Sample = namedtuple('Sample', 'timestamp pressure temperature altitude')
+
+
+def pressure_to_altitude(pressure, sea_level_pressure=SEA_LEVEL_PRESSURE):
+    """Barometarska visina u metrima (ista formula kao Adafruit drajver)"""
+    return 44307.7 * (1 - (pressure / sea_level_pressure) ** 0.190284)
+
+
+def altitude_to_pressure(altitude, sea_level_pressure=SEA_LEVEL_PRESSURE):
+    """Inverz `pressure_to_altitude()` - pritisak u hPa za zadatu visinu"""
+    return sea_level_pressure * (1 - altitude / 44307.7) ** (1 / 0.190284)
+
+
+class BusStats:
+    """Statistika vremena provedenog na I2C magistrali po merenju"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        avg = self.total / self.count if self.count else 0.0
+        return {
+            "samples": self.count,
+            "last_ms": round(self.last * 1000, 3),
+            "avg_ms": round(avg * 1000, 3),
+            "max_ms": round(self.max * 1000, 3)
+        }
+
+
+# BMP390 registri i komande za FIFO (datasheet, poglavlje 3.6 i 4.3)
+_REG_FIFO_LENGTH = 0x12
+_REG_FIFO_DATA = 0x14
+_REG_FIFO_CONFIG_1 = 0x17
+_REG_FIFO_CONFIG_2 = 0x18
+_REG_PWR_CTRL = 0x1B
+_REG_OSR = 0x1C
+_REG_ODR = 0x1D
+_REG_CONFIG = 0x1F
+_REG_CMD = 0x7E
+
+_CMD_FIFO_FLUSH = 0xB0
+_PWR_NORMAL_PRESS_TEMP = 0x33      # normal mode, pritisak i temperatura
+_FIFO_ENABLE_PRESS_TEMP = 0x19     # fifo_mode + fifo_press_en + fifo_temp_en
+_FIFO_SIZE = 512
+
+_FRAME_PRESS_TEMP = 0x94
+_FRAME_TEMP = 0x90
+_FRAME_PRESS = 0x84
+_FRAME_SENSORTIME = 0xA0
+_FRAME_CONFIG_CHANGE = 0x48
+_FRAME_ERROR = 0x44
+_FRAME_EMPTY = 0x80
+
+_OSR_SETTINGS = (1, 2, 4, 8, 16, 32)
+
+
+def _conversion_time(osr_p, osr_t):
+    """Trajanje jednog merenja u sekundama (datasheet, poglavlje 3.9.2)"""
+    return (234 + (392 + 2020 * osr_p) + (163 + 2020 * osr_t)) * 1e-6
+
+
+class BMP390Source:
+    """Pravi BMP390 senzor preko I2C.
+
+    `read()` radi jedno forced merenje, a posle `configure()` senzor
+    radi u normal modu sa zadatim ODR-om i puni FIFO, koji `read_batch()`
+    prazni jednim burst čitanjem.
+    """
+
+    def __init__(self, sea_level_pressure=SEA_LEVEL_PRESSURE):
+        # Adafruit biblioteke postoje samo na RPi-ju, pa ih uvozimo tek ovde
+        import board
+        import busio
+        import adafruit_bmp3xx
+
+        i2c = busio.I2C(board.SCL, board.SDA)
+        self.bmp = adafruit_bmp3xx.BMP3XX_I2C(i2c)
+        self.sea_level_pressure = sea_level_pressure
+        self.bus_stats = BusStats()
+        self.rate = None
+        self.speedup = 1.0
+        self.fifo_overflows = 0
+        self._last_timestamp = 0.0
+
+    def read(self):
+        """Jedno merenje u jednoj transakciji.
+
+        Drajverova svojstva `pressure`, `temperature` i `altitude` svako
+        pokreću posebno merenje, pa `_read()` koristimo direktno: jedno
+        forced merenje i jedno burst čitanje pritiska i temperature.
+        """
+        start = time.perf_counter()
+        pressure, temperature = self.bmp._read()
+        self.bus_stats.add(time.perf_counter() - start)
+
+        pressure /= 100  # Pa -> hPa
+        return Sample(time.monotonic(), pressure, temperature,
+                      pressure_to_altitude(pressure, self.sea_level_pressure))
+
+    def configure(self, rate):
+        """Uključi normal mode sa FIFO-om na najmanjem ODR-u >= `rate`.
+
+        ODR je 200 / 2^n Hz (npr. 25 Hz tačno, a za 2 Hz 3.125 Hz); bira se
+        najveći oversampling pritiska koji staje u period merenja. Vraća
+        stvarnu frekvenciju.
+        """
+        odr_sel = 0
+        while 200.0 / 2 ** (odr_sel + 1) >= rate and odr_sel < 17:
+            odr_sel += 1
+        self.rate = 200.0 / 2 ** odr_sel
+
+        osr_t = 1
+        osr_p = 1
+        for osr in _OSR_SETTINGS:
+            if _conversion_time(osr, osr_t) < 1.0 / self.rate:
+                osr_p = osr
+
+        bmp = self.bmp
+        bmp._write_register_byte(_REG_PWR_CTRL, 0x00)  # sleep dok menjamo podešavanja
+        bmp._write_register_byte(
+            _REG_OSR, _OSR_SETTINGS.index(osr_t) << 3 | _OSR_SETTINGS.index(osr_p))
+        bmp._write_register_byte(_REG_ODR, odr_sel)
+        bmp._write_register_byte(_REG_CONFIG, 0x00)  # IIR isključen, filtriramo sami
+        bmp._write_register_byte(_REG_FIFO_CONFIG_1, _FIFO_ENABLE_PRESS_TEMP)
+        bmp._write_register_byte(_REG_FIFO_CONFIG_2, 0x00)
+        bmp._write_register_byte(_REG_CMD, _CMD_FIFO_FLUSH)
+        bmp._write_register_byte(_REG_PWR_CTRL, _PWR_NORMAL_PRESS_TEMP)
+        self._last_timestamp = time.monotonic()
+        return self.rate
+
+    def read_batch(self):
+        """Isprazni FIFO i vrati sva merenja od prethodnog poziva"""
+        bmp = self.bmp
+        start = time.perf_counter()
+        length_bytes = bmp._read_register(_REG_FIFO_LENGTH, 2)
+        length = (length_bytes[1] & 0x01) << 8 | length_bytes[0]
+        data = bmp._read_register(_REG_FIFO_DATA, length) if length else b''
+        now = time.monotonic()
+        self.bus_stats.add(time.perf_counter() - start)
+
+        raw = self._parse_fifo(data)
+        if length >= _FIFO_SIZE - 7:
+            self.fifo_overflows += 1
+            print("BMP390 FIFO overflow, samples lost")
+
+        # FIFO frejmovi nemaju vreme; poslednji je pročitan upravo sada, a
+        # prethodni su na razmaku 1/ODR unazad
+        period = 1.0 / self.rate
+        first = max(now - (len(raw) - 1) * period, self._last_timestamp + period / 2)
+        samples = []
+        for i, (adc_p, adc_t) in enumerate(raw):
+            pressure, temperature = self._compensate(adc_p, adc_t)
+            pressure /= 100
+            samples.append(Sample(first + i * period, pressure, temperature,
+                                  pressure_to_altitude(pressure, self.sea_level_pressure)))
+        if samples:
+            self._last_timestamp = samples[-1].timestamp
+        return samples
+
+    @staticmethod
+    def _parse_fifo(data):
+        """Raspakuj FIFO frejmove u listu (adc_p, adc_t)"""
+        frames = []
+        i = 0
+        while i < len(data):
+            header = data[i]
+            if header == _FRAME_PRESS_TEMP:
+                if i + 7 > len(data):
+                    break
+                adc_t = data[i + 3] << 16 | data[i + 2] << 8 | data[i + 1]
+                adc_p = data[i + 6] << 16 | data[i + 5] << 8 | data[i + 4]
+                frames.append((adc_p, adc_t))
+                i += 7
+            elif header in (_FRAME_TEMP, _FRAME_PRESS, _FRAME_SENSORTIME):
+                i += 4
+            elif header in (_FRAME_CONFIG_CHANGE, _FRAME_ERROR):
+                i += 2
+            else:  # _FRAME_EMPTY ili nepoznat header - ostatak nije validan
+                break
+        return frames
+
+    def _compensate(self, adc_p, adc_t):
+        """Kompenzacija sirovih vrednosti kao u drajverovom `_read()`"""
+        T1, T2, T3 = self.bmp._temp_calib
+        pd1 = adc_t - T1
+        temperature = pd1 * T2 + (pd1 * pd1) * T3
+
+        P1, P2, P3, P4, P5, P6, P7, P8, P9, P10, P11 = self.bmp._pressure_calib
+        t2 = temperature * temperature
+        t3 = t2 * temperature
+        po1 = P5 + P6 * temperature + P7 * t2 + P8 * t3
+        po2 = adc_p * (P1 + P2 * temperature + P3 * t2 + P4 * t3)
+        adc_p2 = adc_p * adc_p
+        pd4 = adc_p2 * (P9 + P10 * temperature) + P11 * adc_p2 * adc_p
+
+        return po1 + po2 + pd4, temperature
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class _VirtualClock:
+    """Virtuelno vreme koje teče `speedup` puta brže od stvarnog"""
+
+    def __init__(self, speedup=1.0, start=0.0):
+        if speedup <= 0:
+            raise ValueError("speedup must be positive")
+        self.speedup = speedup
+        self.start = start
+        self._real_start = time.monotonic()
+
+    def now(self):
+        return self.start + (time.monotonic() - self._real_start) * self.speedup
+
+    def sleep(self, seconds):
+        time.sleep(seconds / self.speedup)
+
+
+class SimulatedSource:
+    """Sintetički let: smenjuju se termali i klizanje sa šumom senzora.
+
+    Visina se dobija integracijom brzine po segmentima (termal/klizanje)
+    uz malo turbulencije, a pritisak se računa iz visine i dodaje mu se
+    šum reda veličine šuma BMP390.
+
+    Sa `flight_time` let traje toliko sekundi, pa sledi završno klizanje do
+    `ground_altitude` i mirovanje na zemlji; `ground_time` je mirovanje na
+    poletištu pre starta (za proveru automatskog poletanja/sletanja).
+    """
+
+    def __init__(self, speedup=1.0, seed=None, start_altitude=800.0,
+                 ground_altitude=300.0, pressure_noise=0.01,
+                 sea_level_pressure=SEA_LEVEL_PRESSURE, ground_time=0.0, flight_time=None):
+        self.clock = _VirtualClock(speedup)
+        self.speedup = speedup
+        self.rng = random.Random(seed)
+        self.ground_altitude = ground_altitude
+        self.ground_time = ground_time
+        self.flight_time = flight_time
+        self._on_ground = False
+        self.pressure_noise = pressure_noise
+        self.sea_level_pressure = sea_level_pressure
+
+        self._segment_start = 0.0
+        self._segment_end = 0.0
+        self._segment_altitude = start_altitude
+        self._segment_rate = 0.0
+        self._next_segment()
+        self.bus_stats = BusStats()
+        self.rate = DEFAULT_SAMPLE_RATE
+        self._next_timestamp = None
+
+    def _next_segment(self):
+        """Izaberi sledeći segment leta (termal ili klizanje)"""
+        duration = self._segment_end - self._segment_start
+        self._segment_altitude += self._segment_rate * duration
+        self._segment_start = self._segment_end
+        self._on_ground = False
+
+        landing_at = None if self.flight_time is None else self.ground_time + self.flight_time
+        near_ground = self._segment_altitude < self.ground_altitude + 150
+        if self._segment_start < self.ground_time:
+            self._on_ground = True
+            self._segment_rate = 0.0
+            duration = self.ground_time - self._segment_start
+        elif landing_at is not None and self._segment_start >= landing_at:
+            if self._segment_altitude > self.ground_altitude:
+                # Završno klizanje do sletanja
+                self._segment_rate = -1.5
+                duration = (self._segment_altitude - self.ground_altitude) / 1.5
+            else:
+                self._on_ground = True
+                self._segment_rate = 0.0
+                duration = 3600.0
+        elif near_ground or self.rng.random() < 0.4:
+            self._segment_rate = self.rng.uniform(0.5, 4.0)
+            duration = self.rng.uniform(60, 300)
+        else:
+            self._segment_rate = self.rng.uniform(-2.0, -0.8)
+            duration = self.rng.uniform(30, 180)
+        self._segment_end = self._segment_start + duration
+        if landing_at is not None and self._segment_start < landing_at < self._segment_end:
+            self._segment_end = landing_at
+
+    def true_altitude(self, t):
+        """Visina bez šuma u virtuelnom trenutku `t` (za poređenje filtera)"""
+        while t >= self._segment_end:
+            self._next_segment()
+        base = self._segment_altitude + self._segment_rate * (t - self._segment_start)
+        if self._on_ground:
+            return base
+        turbulence = 0.3 * math.sin(2 * math.pi * t / 7.0)
+        return base + turbulence
+
+    def _sample_at(self, t):
+        altitude = self.true_altitude(t)
+        pressure = (altitude_to_pressure(altitude, self.sea_level_pressure)
+                    + self.rng.gauss(0.0, self.pressure_noise))
+        # Standardni vertikalni gradijent od 6.5 °C/km
+        temperature = 15.0 - 0.0065 * altitude
+        return Sample(t, pressure, temperature,
+                      pressure_to_altitude(pressure, self.sea_level_pressure))
+
+    def read(self):
+        start = time.perf_counter()
+        sample = self._sample_at(self.clock.now())
+        self.bus_stats.add(time.perf_counter() - start)
+        return sample
+
+    def configure(self, rate):
+        self.rate = rate
+        self._next_timestamp = self.clock.now()
+        return rate
+
+    def read_batch(self):
+        """Merenja na razmaku 1/rate od prethodnog poziva do sada"""
+        start = time.perf_counter()
+        now = self.clock.now()
+        if self._next_timestamp is None:
+            self._next_timestamp = now
+        samples = []
+        while self._next_timestamp <= now:
+            samples.append(self._sample_at(self._next_timestamp))
+            self._next_timestamp += 1.0 / self.rate
+        self.bus_stats.add(time.perf_counter() - start)
+        return samples
+
+    def sleep(self, seconds):
+        self.clock.sleep(seconds)
+
+
+class ReplaySource:
+    """Reprodukuje snimljeni log pritiska proizvoljnom brzinom.
+
+    Log je CSV sa kolonama `timestamp,pressure,temperature` (sekunde, hPa,
+    °C; zaglavlje je opciono) ili snimljena trasa leta (`.trk`). Kada log dođe do kraja, kreće se ispočetka
+    ako je `loop` uključen, a vreme nastavlja da raste. Frekvencija merenja
+    je ona iz loga, `configure()` je ne menja.
+    """
+
+    def __init__(self, path, speedup=1.0, loop=True,
+                 sea_level_pressure=SEA_LEVEL_PRESSURE):
+        self.rows = self._load(path)
+        if not self.rows:
+            raise ValueError(f"Replay log {path} is empty")
+        self.loop = loop
+        self.sea_level_pressure = sea_level_pressure
+        self.clock = _VirtualClock(speedup, start=self.rows[0][0])
+        self.speedup = speedup
+        self.bus_stats = BusStats()
+
+        first, last = self.rows[0][0], self.rows[-1][0]
+        spacing = (last - first) / (len(self.rows) - 1) if len(self.rows) > 1 else 1.0
+        self.rate = 1.0 / spacing if spacing > 0 else DEFAULT_SAMPLE_RATE
+        self._period = last - first + spacing
+        self._index = 0
+        self._offset = 0.0
+        self._last = self._sample(self.rows[0])
+
+    @staticmethod
+    def _load(path):
+        if path.endswith(flight_track.TRACK_EXTENSION):
+            return [(start + record[0] / 1000, record[1], record[2])
+                    for start, record in flight_track.read_track(path)]
+
+        rows = []
+        with open(path, newline='') as f:
+            for row in csv.reader(f):
+                try:
+                    rows.append((float(row[0]), float(row[1]), float(row[2])))
+                except (ValueError, IndexError):
+                    continue  # zaglavlje ili oštećen red
+        return rows
+
+    def _sample(self, row):
+        t, pressure, temperature = row
+        return Sample(t + self._offset, pressure, temperature,
+                      pressure_to_altitude(pressure, self.sea_level_pressure))
+
+    def _advance(self):
+        """Redovi loga do trenutnog virtuelnog vremena"""
+        now = self.clock.now()
+        samples = []
+        while self._index < len(self.rows):
+            if self.rows[self._index][0] + self._offset > now:
+                break
+            samples.append(self._sample(self.rows[self._index]))
+            self._index += 1
+            if self._index == len(self.rows) and self.loop:
+                self._index = 0
+                self._offset += self._period
+        if samples:
+            self._last = samples[-1]
+        return samples
+
+    def read(self):
+        start = time.perf_counter()
+        self._advance()
+        self.bus_stats.add(time.perf_counter() - start)
+        return self._last
+
+    def configure(self, rate):
+        self._advance()
+        return self.rate
+
+    def read_batch(self):
+        start = time.perf_counter()
+        samples = self._advance()
+        self.bus_stats.add(time.perf_counter() - start)
+        return samples
+
+    def sleep(self, seconds):
+        self.clock.sleep(seconds)
+
+
+def create_source():
+    """Napravi izvor na osnovu promenljivih okruženja.
+
+    VARIO_SENSOR  - `bmp390` (podrazumevano), `sim` ili `replay`
+    VARIO_REPLAY  - putanja do loga za `replay`
+    VARIO_SPEEDUP - ubrzanje vremena za `sim`/`replay` (npr. 100)
+    VARIO_SEED    - seed za `sim`, za ponovljive simulacije
+    VARIO_SIM_FLIGHT - za `sim`: "mirovanje,let" u sekundama (npr. "300,1800"),
+                    mirovanje na poletištu, let, pa sletanje
+    """
+    kind = os.environ.get('VARIO_SENSOR', 'bmp390').lower()
+    speedup = float(os.environ.get('VARIO_SPEEDUP', '1'))
+
+    if kind == 'bmp390':
+        return BMP390Source()
+    if kind == 'sim':
+        seed = os.environ.get('VARIO_SEED')
+        phases = os.environ.get('VARIO_SIM_FLIGHT')
+        ground_time, flight_time = (float(v) for v in phases.split(',')) if phases else (0.0, None)
+        return SimulatedSource(speedup=speedup,
+                               seed=int(seed) if seed is not None else None,
+                               ground_time=ground_time, flight_time=flight_time)
+    if kind == 'replay':
+        path = os.environ.get('VARIO_REPLAY')
+        if not path:
+            raise ValueError("VARIO_REPLAY must point to a pressure log")
+        return ReplaySource(path, speedup=speedup)
+    raise ValueError(f"Unknown VARIO_SENSOR: {kind}")
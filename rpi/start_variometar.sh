@@ -1,51 +1,59 @@
 #!/bin/bash
-sleep 10
+LOG=/home/milaogi/debug.log
 
-echo "=== VARIOMETER STARTUP LOG ===" > /home/milaogi/debug.log
-date >> /home/milaogi/debug.log
+echo "=== VARIOMETER STARTUP LOG ===" > $LOG
+date >> $LOG
+echo "Uptime: $(cut -d' ' -f1 /proc/uptime) s" >> $LOG
+
+cd /home/milaogi
+source variometar_env/bin/activate
+
+# Server se pokreće odmah: sam otvara senzor (sa ponovnim pokušajima) i
+# sluša na svim interfejsima, pa ne čeka da se hotspot podigne
+echo "Starting web app..." >> $LOG
+echo "Running as user: $(whoami)" >> $LOG
+echo "Groups: $(groups)" >> $LOG
+
+VARIO_ASYNC_MODE=gevent python3 variometar_web.py >> /home/milaogi/app.log 2>&1 &
+APP_PID=$!
+
+echo "App started with PID: $APP_PID" >> $LOG
 
 # Ugasi NetworkManager PRIVREMENO (3 minuta)
-echo "Stopping NetworkManager for hotspot mode..." >> /home/milaogi/debug.log
+echo "Stopping NetworkManager for hotspot mode..." >> $LOG
 sudo systemctl stop NetworkManager
 
 # Resetuj interfejs
 sudo wpa_cli disconnect 2>/dev/null
 sudo ip link set wlan0 down
-sleep 2
 sudo ip link set wlan0 up
 sudo ip addr flush dev wlan0
 sudo ip addr add 192.168.4.1/24 dev wlan0
 
-# Restartuj servise
+# Restartuj servise (systemctl čeka da se servis pokrene)
 sudo systemctl restart hostapd
 sudo systemctl restart dnsmasq
-sleep 20
-
-echo "Starting web app..." >> /home/milaogi/debug.log
-cd /home/milaogi
-source variometar_env/bin/activate
-
-# Test osnovni Python pristup senzoru:
-python3 -c "
-import board, busio, adafruit_bmp3xx
-i2c = busio.I2C(board.SCL, board.SDA)  
-bmp = adafruit_bmp3xx.BMP3XX_I2C(i2c)
-print('Temp:', bmp.temperature)
-print('Press:', bmp.pressure)
-print('Alt:', bmp.altitude)
-"
-echo "Running as user: $(whoami)" >> /home/milaogi/debug.log
-echo "Groups: $(groups)" >> /home/milaogi/debug.log
-
-python3 variometar_web.py >> /home/milaogi/app.log 2>&1 &
-APP_PID=$!
 
-echo "App started with PID: $APP_PID" >> /home/milaogi/debug.log
+# Zabeleži kada senzor daje merenja (/readyz sadrži i vremena pokretanja)
+READY=0
+for i in $(seq 1 60); do
+    if curl -sf http://127.0.0.1:5000/readyz >> $LOG; then
+        READY=1
+        break
+    fi
+    sleep 0.5
+done
+echo "" >> $LOG
+if [ $READY -eq 1 ]; then
+    echo "Ready at uptime: $(cut -d' ' -f1 /proc/uptime) s" >> $LOG
+else
+    echo "WARNING: /readyz not ready after 30 s (uptime $(cut -d' ' -f1 /proc/uptime) s), see app.log" >> $LOG
+fi
 
 # Čekaj 3 minuta za hotspot mode
 sleep 180
 
-echo "Switching back to WiFi..." >> /home/milaogi/debug.log
+echo "Switching back to WiFi..." >> $LOG
 # Ugasi aplikaciju
 kill $APP_PID
 
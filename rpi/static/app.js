@@ -0,0 +1,173 @@
+const socket = io();
+let recording = false;
+
+socket.on('sensor_data', function(data) {
+    document.getElementById('temperature').textContent = data.temperature;
+    document.getElementById('pressure').textContent = data.pressure;
+    document.getElementById('altitude').textContent = data.altitude;
+
+    // Climb rate sa bojama
+    const climbRate = data.climb_rate;
+    const climbElement = document.getElementById('climb_rate');
+    climbElement.textContent = climbRate > 0 ? '+' + climbRate : climbRate;
+
+    // Oboji na osnovu brzine
+    climbElement.className = 'value climb-rate ';
+    if (climbRate > 0.2) {
+        climbElement.className += 'climb-up';
+    } else if (climbRate < -0.2) {
+        climbElement.className += 'climb-down';
+    } else {
+        climbElement.className += 'climb-stable';
+    }
+});
+
+socket.on('flight_started', function() {
+    recording = true;
+    document.getElementById('startBtn').className = 'btn recording';
+    document.getElementById('startBtn').textContent = '🔴 SNIMAM...';
+    document.getElementById('stopBtn').className = 'btn stop-btn';
+});
+
+socket.on('flight_stopped', function(data) {
+    recording = false;
+    document.getElementById('startBtn').className = 'btn start-btn';
+    document.getElementById('startBtn').textContent = '✈️ POKRENI LET';
+    document.getElementById('stopBtn').className = 'btn stop-btn disabled';
+
+    // Osvežava listu letova
+    loadFlights();
+});
+
+function showTab(tabName) {
+    // Sakrij sve tab-ove
+    document.querySelectorAll('.tab-content').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    document.querySelectorAll('.tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+
+    // Prikaži selektovani tab
+    document.getElementById(tabName + '-content').classList.add('active');
+    event.target.classList.add('active');
+
+    // Učitaj letove ako je flights tab
+    if (tabName === 'flights') {
+        loadFlights();
+    }
+}
+
+// Lista letova se učitava po stranicama (/api/flights vraća i ukupan broj)
+const FLIGHTS_PER_PAGE = 50;
+let flightsPage = 0;
+
+function flightItem(flight) {
+    const filename = flight.filename;
+    // start_time je ISO sa beogradskom zonom: "YYYY-MM-DDTHH:MM:SS..."
+    const formattedDate = flight.start_time.substring(0, 10);
+    const formattedTime = flight.start_time.substring(11, 19);
+    const duration = Math.round(flight.duration_seconds / 60);
+
+    return `
+        <div class="flight-item">
+            <div class="flight-info" onclick="viewFlight('${filename}')">
+                <div class="flight-header">${formattedDate} ${formattedTime}</div>
+                <div class="flight-details">${duration} min · max ${flight.max_altitude.toFixed(0)}m · +${flight.max_climb_rate.toFixed(1)} m/s · <a href="/api/flight/${filename}/export?format=igc" onclick="event.stopPropagation()">IGC</a></div>
+            </div>
+            <button class="delete-btn" onclick="deleteFlight('${filename}'); event.stopPropagation();">
+                🗑️ Obriši
+            </button>
+        </div>
+    `;
+}
+
+function loadFlights(more = false) {
+    const page = more ? flightsPage + 1 : 1;
+    fetch(`/api/flights?page=${page}&per_page=${FLIGHTS_PER_PAGE}`)
+        .then(response => response.json())
+        .then(result => {
+            const flightList = document.getElementById('flightList');
+            flightsPage = page;
+
+            if (!more && result.flights.length === 0) {
+                flightList.innerHTML = '<div style="text-align: center; color: #666;">Nema snimljenih letova</div>';
+                return;
+            }
+
+            const items = result.flights.map(flightItem).join('');
+            if (more) {
+                document.getElementById('loadMoreFlights').remove();
+                flightList.insertAdjacentHTML('beforeend', items);
+            } else {
+                flightList.innerHTML = items;
+            }
+
+            const shown = flightList.querySelectorAll('.flight-item').length;
+            if (shown < result.total) {
+                flightList.insertAdjacentHTML('beforeend',
+                    `<button id="loadMoreFlights" class="btn" onclick="loadFlights(true)">Učitaj još (${shown}/${result.total})</button>`);
+            }
+        })
+        .catch(error => {
+            document.getElementById('flightList').innerHTML =
+                '<div style="text-align: center; color: #f44336;">Greška pri učitavanju letova</div>';
+        });
+}
+
+function viewFlight(filename) {
+    fetch(`/api/flight/${filename}`)
+        .then(response => response.json())
+        .then(flight => {
+            const duration = Math.round(flight.duration_seconds / 60);
+            const altGain = flight.max_altitude - flight.min_altitude;
+
+            const startTime = new Date(flight.start_time);
+            const formattedDateTime = startTime.toLocaleString('sr-RS', {
+                year: 'numeric',
+                month: '2-digit',
+                day: '2-digit',
+                hour: '2-digit',
+                minute: '2-digit',
+                hour12: false
+            });
+
+            alert(`Detalji Leta:\n\nDatum: ${formattedDateTime}\nTrajanje: ${duration} min\nMax visina: ${flight.max_altitude.toFixed(1)}m\nMin visina: ${flight.min_altitude.toFixed(1)}m\nVisinska razlika: ${altGain.toFixed(1)}m\nMax penjanje: ${flight.max_climb_rate.toFixed(1)} m/s\nMax spuštanje: ${flight.max_sink_rate.toFixed(1)} m/s\nProsečna temperatura: ${flight.avg_temperature.toFixed(1)} °C`);
+        })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Greška pri učitavanju leta');
+    });
+}
+
+function deleteFlight(filename) {
+    if (!confirm('Da li si siguran da želiš da obrišeš ovaj let?')) {
+        return;
+    }
+
+    fetch(`/api/flight/${filename}`, { method: 'DELETE' })
+        .then(response => response.json())
+        .then(result => {
+            if (result.success) {
+                loadFlights(); // Osvežava listu
+            } else {
+                alert('Greška pri brisanju leta');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Greška pri brisanju leta');
+        });
+}
+
+function startFlight() {
+    if (!recording) {
+        socket.emit('start_flight');
+    }
+}
+
+function stopFlight() {
+    if (recording) {
+        socket.emit('stop_flight');
+    }
+}
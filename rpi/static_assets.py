@@ -0,0 +1,124 @@
+"""Statički fajlovi web interfejsa, kompresovani unapred i sa keširanjem.
+
+Pri startu servera se svi fajlovi iz `static/` učitaju u memoriju i
+kompresuju (gzip, i brotli ako je instaliran paket `brotli`), pa se po
+zahtevu ne radi nikakva kompresija. Svaki fajl dobija ETag po sadržaju.
+Sa `compress=False` kompresija se radi kasnije (`compress()`, npr. u
+pozadini posle starta), a do tada se šalju nekompresovani fajlovi.
+
+- `index.html` se uvek proverava (`Cache-Control: no-cache`), pa je posle
+  prve posete dovoljan jedan mali uslovni zahtev koji vraća 304.
+- Ostali fajlovi se u `index.html` referenciraju sa verzijom (`?v=<etag>`)
+  i keširaju godinu dana; nova verzija fajla menja URL.
+"""
+
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+INDEX = 'index.html'
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+
+class Asset:
+    """Jedan fajl sa unapred kompresovanim varijantama"""
+
+    def __init__(self, name, body, mtime, compress=True):
+        self.name = name
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.etag = hashlib.sha1(body).hexdigest()[:16]
+        self.last_modified = email.utils.formatdate(mtime, usegmt=True)
+        self.mtime = int(mtime)
+
+        self.bodies = {'identity': body}
+        if compress:
+            self.compress()
+
+    def compress(self):
+        body = self.bodies['identity']
+        bodies = dict(self.bodies)
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body):
+            bodies['gzip'] = gz
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+            if len(br) < len(body):
+                bodies['br'] = br
+        # Zamena celog rečnika, da zahtev u toku ne vidi delimično stanje
+        self.bodies = bodies
+
+
+class AssetStore:
+    """Svi fajlovi iz direktorijuma, spremni za slanje"""
+
+    def __init__(self, directory, url_prefix='/static/', compress=True):
+        self.url_prefix = url_prefix
+        self.assets = {}
+
+        names = sorted(os.listdir(directory))
+        for name in names:
+            path = os.path.join(directory, name)
+            if name != INDEX and os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    self.assets[name] = Asset(name, f.read(), os.path.getmtime(path), compress)
+
+        # index.html referencira ostale fajlove sa verzijom u URL-u
+        index_path = os.path.join(directory, INDEX)
+        with open(index_path, encoding='utf-8') as f:
+            index = f.read()
+        for name in self.assets:
+            index = index.replace(f'"{url_prefix}{name}"', f'"{self.url(name)}"')
+        self.assets[INDEX] = Asset(INDEX, index.encode('utf-8'), os.path.getmtime(index_path), compress)
+
+    def compress(self):
+        """Kompresuj fajlove napravljene sa `compress=False`"""
+        for asset in self.assets.values():
+            if len(asset.bodies) == 1:
+                asset.compress()
+
+    def url(self, name):
+        return f'{self.url_prefix}{name}?v={self.assets[name].etag}'
+
+    def response(self, name, request):
+        """HTTP odgovor za fajl, uz 304 i izbor kompresije po zaglavljima zahteva"""
+        asset = self.assets.get(name)
+        if asset is None:
+            return Response('Not found', status=404)
+
+        immutable = name != INDEX and request.args.get('v') == asset.etag
+        headers = {
+            'ETag': f'"{asset.etag}"',
+            'Last-Modified': asset.last_modified,
+            'Cache-Control': IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            'Vary': 'Accept-Encoding'
+        }
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            not_modified = asset.etag in if_none_match or if_none_match.strip() == '*'
+        else:
+            since = request.if_modified_since
+            not_modified = since is not None and asset.mtime <= since.timestamp()
+        if not_modified:
+            return Response(status=304, headers=headers)
+
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in asset.bodies and accepted[encoding]:
+                headers['Content-Encoding'] = encoding
+                body = asset.bodies[encoding]
+                break
+        else:
+            body = asset.bodies['identity']
+
+        return Response(body, mimetype=asset.mimetype, headers=headers)
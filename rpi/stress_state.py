@@ -0,0 +1,109 @@
+"""Stres test za VarioState: start/stop leta iz više thread-ova uz brzo merenje.
+
+Jedan thread dodaje merenja što brže može (kao senzor na visokoj
+frekvenciji), a više thread-ova nasumično pokreće i zaustavlja let. Svako
+merenje nosi svoj redni broj u polju pritiska, pa se posle toga za svaki
+snimljeni let proverava:
+
+- broj zapisa u trasi je jednak `data_points` u statistikama
+- redni brojevi u trasi su uzastopni (nijedno merenje nije izgubljeno dok
+  je let trajao)
+- nijedno merenje nije upisano u dva leta
+- statistike odgovaraju onima izračunatim iz trase
+
+Primer:
+    python3 stress_state.py --duration 10 --threads 8
+"""
+
+import argparse
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import flight_track
+from sensor_source import Sample
+from vario_state import VarioState
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--threads', type=int, default=8, help="thread-ova za start/stop")
+    args = parser.parse_args()
+
+    state = VarioState({})
+    flights_dir = tempfile.mkdtemp(prefix='vario_stress_')
+    flight_ids = itertools.count()
+    finished = []
+    finished_lock = threading.Lock()
+    stop = threading.Event()
+    fed = [0]
+
+    def feeder():
+        for seq in itertools.count(1):
+            if stop.is_set():
+                fed[0] = seq - 1
+                return
+            sample = Sample(seq * 0.001, float(seq), 20.0 + seq % 7, 500.0 + seq % 100)
+            state.record(sample, sample.altitude, (seq % 11) - 5.0)
+
+    def hammer():
+        rng = random.Random()
+        while not stop.is_set():
+            if rng.random() < 0.5:
+                path = os.path.join(flights_dir, f'f{next(flight_ids)}.trk')
+                state.start_flight(time.time(),
+                                   lambda: flight_track.TrackWriter(path, time.time(), fsync_interval=60))
+            else:
+                flight = state.stop_flight()
+                if flight is not None:
+                    with finished_lock:
+                        finished.append(flight)
+            time.sleep(rng.uniform(0, 0.02))
+
+    threads = [threading.Thread(target=feeder)]
+    threads += [threading.Thread(target=hammer) for _ in range(args.threads)]
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    last = state.stop_flight()
+    if last is not None:
+        finished.append(last)
+
+    errors = 0
+    seen = set()
+    recorded = 0
+    for flight in finished:
+        seqs = [int(record[1]) for _, record in flight_track.read_track(flight.writer.path)]
+        stats, _, _ = flight_track.summarize_track(flight.writer.path)
+        recorded += len(seqs)
+        problems = []
+        if len(seqs) != flight.stats["data_points"]:
+            problems.append(f"{len(seqs)} records vs {flight.stats['data_points']} data points")
+        if seqs and seqs != list(range(seqs[0], seqs[0] + len(seqs))):
+            problems.append("gap in sample sequence")
+        if seen.intersection(seqs):
+            problems.append("sample recorded in two flights")
+        if abs(stats["max_altitude"] - flight.stats["max_altitude"]) > 1e-3:
+            problems.append("max_altitude mismatch")
+        seen.update(seqs)
+        if problems:
+            errors += 1
+            print(f"{os.path.basename(flight.writer.path)}: {', '.join(problems)}")
+
+    shutil.rmtree(flights_dir)
+    print(f"{fed[0]} samples fed, {len(finished)} flights, {recorded} samples recorded, "
+          f"{errors} flights with errors")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""Batched telemetrija preko Socket.IO sa dogovorom frekvencije po klijentu.
+
+Klijent se prijavljuje događajem `subscribe` sa opcijama:
+
+    rate    - broj poruka u sekundi (podrazumevano 2)
+    samples - željeni broj merenja u sekundi; server šalje svako N-to
+              merenje (podrazumevano sva)
+    format  - `json` ili `msgpack` (binarno, ako je paket instaliran)
+    ack     - da li klijent potvrđuje poruke (podrazumevano false); vraća
+              vrednost iz handler-a `telemetry` poruke (Socket.IO ack)
+    since   - poslednji seq koji klijent ima (npr. posle ponovnog
+              povezivanja); server prvo šalje `history` sa merenjima
+              posle njega (vidi live_history.py)
+
+i dobija `subscribed` sa dogovorenim vrednostima, a zatim `telemetry`
+poruke sa više merenja. Vrednosti su celi brojevi, a vreme, visina,
+pritisak i temperatura su delta kodirani (prvi element je apsolutna
+vrednost, ostali razlika u odnosu na prethodni):
+
+    seq     - redni broj prvog merenja, stride - razmak rednih brojeva
+    t0, dt  - unix vreme prvog merenja (ms) i razlike vremena (ms)
+    alt     - visina (cm), delta
+    vario   - brzina penjanja (cm/s)
+    p       - pritisak (Pa), delta
+    temp    - temperatura (0.1 °C), delta
+    dropped - broj merenja izostavljenih od prethodne poruke
+
+Klijent sa `ack` koji ne stiže da potvrdi prethodnu poruku ne dobija novu
+(najviše ACK_TIMEOUT sekundi); merenja se skupljaju, a kada ih je više od
+`max_batch` šalju se samo najnovija. Tako spor klijent gubi merenja umesto
+da usporava senzor ili druge klijente. Bez `ack` poruke stižu dogovorenom
+frekvencijom.
+"""
+
+import threading
+from collections import namedtuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Merenje u ring buffer-u: redni broj, Sample, filtrirana visina, vario
+Reading = namedtuple('Reading', 'seq sample altitude climb_rate')
+
+MIN_FRAME_RATE = 0.2
+MAX_FRAME_RATE = 20.0
+ACK_TIMEOUT = 5.0
+
+
+def _delta(values):
+    return values[:1] + [b - a for a, b in zip(values, values[1:])]
+
+
+def frame_from_columns(seq, stride, times, altitude, vario, pressure, temperature, dropped):
+    """Poruka od kolona celobrojnih vrednosti (ms, cm, cm/s, Pa, 0.1 °C)"""
+    return {
+        "seq": seq,
+        "stride": stride,
+        "t0": times[0] if times else None,
+        "dt": _delta(times)[1:],
+        "alt": _delta(altitude),
+        "vario": vario,
+        "p": _delta(pressure),
+        "temp": _delta(temperature),
+        "dropped": dropped
+    }
+
+
+def encode_frame(readings, epoch_of, stride, dropped):
+    """Napravi kompaktnu poruku od liste `Reading`-a"""
+    return frame_from_columns(
+        readings[0].seq, stride,
+        [round(epoch_of(r.sample.timestamp) * 1000) for r in readings],
+        [round(r.altitude * 100) for r in readings],
+        [round(r.climb_rate * 100) for r in readings],
+        [round(r.sample.pressure * 100) for r in readings],
+        [round(r.sample.temperature * 10) for r in readings],
+        dropped)
+
+
+class _Subscription:
+    def __init__(self, frame_interval, samples, stride, binary, ack, last_seq):
+        self.frame_interval = frame_interval
+        self.samples = samples  # traženo (None = sva merenja), za novi stride pri promeni frekvencije
+        self.stride = stride
+        self.binary = binary
+        self.ack = ack
+        self.last_seq = last_seq
+        self.next_due = 0.0
+        self.in_flight_since = None
+        self.dropped = 0
+
+
+class TelemetryHub:
+    """Prijavljeni klijenti i slanje batch poruka svakom od njih.
+
+    `emit(event, data, to, callback)` šalje poruku jednom klijentu, a
+    `epoch_of(timestamp)` pretvara vreme izvora u unix vreme.
+    """
+
+    def __init__(self, emit, epoch_of, sample_rate, max_batch_seconds=2.0):
+        self.emit = emit
+        self.epoch_of = epoch_of
+        self.sample_rate = sample_rate
+        self.max_batch_seconds = max_batch_seconds
+        self.frames_sent = 0
+        self.samples_dropped = 0
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._clients)
+
+    def _stride(self, samples):
+        """Svako koliko merenje se šalje za `samples` merenja u sekundi"""
+        if samples is None or samples <= 0:
+            return 1
+        return max(1, round(self.sample_rate / samples))
+
+    def negotiate(self, options):
+        """Dogovorene opcije za `options` zahteva `subscribe`, bez prijave"""
+        rate = float(options.get('rate', 2.0))
+        rate = min(max(rate, MIN_FRAME_RATE), MAX_FRAME_RATE)
+        samples = options.get('samples')
+        stride = self._stride(None if samples is None else float(samples))
+        fmt = options.get('format', 'json')
+        binary = fmt == 'msgpack' and msgpack is not None
+        ack = bool(options.get('ack', False))
+        return {
+            "rate": rate,
+            "samples": self.sample_rate / stride,
+            "sample_rate": self.sample_rate,
+            "stride": stride,
+            "format": 'msgpack' if binary else 'json',
+            "ack": ack
+        }
+
+    def subscribe(self, sid, options, last_seq):
+        """Prijavi klijenta (šalju mu se merenja posle `last_seq`), vrati dogovorene opcije"""
+        negotiated = self.negotiate(options)
+        with self._lock:
+            self._clients[sid] = _Subscription(
+                1.0 / negotiated["rate"],
+                None if options.get('samples') is None else float(options['samples']),
+                negotiated["stride"],
+                negotiated["format"] == 'msgpack', negotiated["ack"], last_seq)
+        return negotiated
+
+    def set_sample_rate(self, rate):
+        """Nova frekvencija senzora (npr. promena režima napajanja).
+
+        Stride prijavljenih klijenata se ponovo računa iz traženog broja
+        merenja; poruke nose `stride`, pa klijent ne mora ponovo da se prijavi.
+        """
+        self.sample_rate = rate
+        with self._lock:
+            for sub in self._clients.values():
+                sub.stride = self._stride(sub.samples)
+
+    @staticmethod
+    def pack(payload, negotiated):
+        """Poruka u dogovorenom formatu (JSON objekat ili MessagePack bajtovi)"""
+        return msgpack.packb(payload) if negotiated["format"] == 'msgpack' else payload
+
+    def unsubscribe(self, sid):
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def tick(self, readings, now):
+        """Pošalji poruke klijentima kojima je vreme; `readings` su rastuće po seq"""
+        if not readings:
+            return
+        with self._lock:
+            clients = list(self._clients.items())
+
+        first_seq = readings[0].seq
+        max_batch = max(1, int(self.max_batch_seconds * self.sample_rate))
+        for sid, sub in clients:
+            if now < sub.next_due:
+                continue
+            if sub.in_flight_since is not None:
+                if now - sub.in_flight_since < ACK_TIMEOUT:
+                    continue  # prethodna poruka nije potvrđena, merenja se skupljaju
+                sub.in_flight_since = None
+
+            if sub.last_seq < first_seq - 1:
+                # Klijent je zaostao više od celog buffer-a
+                sub.dropped += (first_seq - 1 - sub.last_seq) // sub.stride
+            start = max(sub.last_seq + 1 - first_seq, 0)
+            pending = [r for r in readings[start:] if r.seq % sub.stride == 0]
+            sub.last_seq = readings[-1].seq
+            if not pending:
+                continue
+            if len(pending) > max_batch:
+                sub.dropped += len(pending) - max_batch
+                pending = pending[-max_batch:]
+
+            frame = encode_frame(pending, self.epoch_of, sub.stride, sub.dropped)
+            self.samples_dropped += sub.dropped
+            sub.dropped = 0
+            # Sledeći rok od prethodnog roka (bez drift-a), osim ako je klijent zaostao
+            sub.next_due += sub.frame_interval
+            if sub.next_due <= now:
+                sub.next_due = now + sub.frame_interval
+            payload = msgpack.packb(frame) if sub.binary else frame
+
+            callback = None
+            if sub.ack:
+                sub.in_flight_since = now
+                callback = self._make_ack(sub)
+            self.emit('telemetry', payload, sid, callback)
+            self.frames_sent += 1
+
+    @staticmethod
+    def _make_ack(sub):
+        def ack(*_):
+            sub.in_flight_since = None
+        return ack
@@ -0,0 +1,51 @@
+"""Testovi istorije poslednjih merenja (live_history.py); pokretanje: `python3 -m pytest`"""
+
+from live_history import LiveHistory
+
+
+def _filled(capacity, count):
+    history = LiveHistory(capacity)
+    for seq in range(1, count + 1):
+        history.append(seq, seq * 0.04, 100.0 + seq, 0.5, 950.0, 20.0)
+    return history
+
+
+def _seqs(frame):
+    return [frame["seq"] + i * frame["stride"] for i in range(len(frame["vario"]))]
+
+
+def test_nothing_dropped_before_wrap():
+    history = _filled(600, 200)
+    for stride in (1, 5, 25):
+        # Kao pri povezivanju: `after` je negativan dok prsten nije pun
+        frame = history.frame(200 - history.capacity, lambda t: t, until=200, stride=stride)
+        assert frame["dropped"] == 0
+        assert _seqs(frame) == list(range(stride, 201, stride))
+        assert frame["last_seq"] == 200
+
+
+def test_dropped_counts_evicted_samples():
+    history = _filled(100, 250)
+    frame = history.frame(0, lambda t: t)
+    assert _seqs(frame) == list(range(151, 251))
+    assert frame["dropped"] == 150
+
+
+def test_since_continues_without_gaps():
+    history = _filled(100, 250)
+    frame = history.frame(240, lambda t: t)
+    assert _seqs(frame) == list(range(241, 251))
+    assert frame["dropped"] == 0
+
+
+def test_since_after_restart_returns_everything():
+    history = _filled(100, 50)
+    frame = history.frame(5000, lambda t: t)
+    assert _seqs(frame) == list(range(1, 51))
+    assert frame["dropped"] == 0
+
+
+def test_overwritten_slot_is_skipped():
+    history = _filled(10, 25)
+    history._seq[16 % 10] = 0  # upis u toku na najstarijem mestu
+    assert history.columns(0)[0] == list(range(17, 26))
@@ -0,0 +1,56 @@
+"""Testovi batch telemetrije (telemetry.py); pokretanje: `python3 -m pytest`"""
+
+from sensor_source import Sample
+from telemetry import Reading, TelemetryHub
+
+
+def _hub(sample_rate):
+    return TelemetryHub(lambda *args: None, lambda t: t, sample_rate)
+
+
+def test_stride_follows_requested_samples():
+    hub = _hub(25.0)
+    assert hub.subscribe('a', {'samples': 5}, 0)["stride"] == 5
+    assert hub.subscribe('b', {}, 0)["stride"] == 1
+
+
+def test_set_sample_rate_recomputes_strides():
+    hub = _hub(25.0)
+    hub.subscribe('five', {'samples': 5}, 0)
+    hub.subscribe('all', {}, 0)
+
+    hub.set_sample_rate(3.125)  # idle
+    assert hub._clients['five'].stride == 1
+    assert hub._clients['all'].stride == 1
+    assert hub.negotiate({'samples': 1})["stride"] == 3
+
+    hub.set_sample_rate(25.0)
+    assert hub._clients['five'].stride == 5
+    assert hub._clients['all'].stride == 1
+
+
+def _readings(first, count):
+    return [Reading(seq, Sample(seq * 0.04, 950.0, 20.0, 100.0), 100.0, 0.5)
+            for seq in range(first, first + count)]
+
+
+def test_frames_keep_rate_without_ack():
+    sent = []
+    hub = TelemetryHub(lambda event, data, to, callback: sent.append(callback), lambda t: t, 25.0)
+    hub.subscribe('plain', {'rate': 2}, 0)
+    for tick in range(4):
+        hub.tick(_readings(1 + tick * 13, 13), tick * 0.5)
+    assert len(sent) == 4
+    assert sent == [None] * 4
+
+
+def test_unacked_frame_holds_the_next_one():
+    sent = []
+    hub = TelemetryHub(lambda event, data, to, callback: sent.append(callback), lambda t: t, 25.0)
+    hub.subscribe('acking', {'rate': 2, 'ack': True}, 0)
+    hub.tick(_readings(1, 13), 0.0)
+    hub.tick(_readings(14, 13), 0.5)
+    assert len(sent) == 1
+    sent[0]()
+    hub.tick(_readings(27, 13), 1.0)
+    assert len(sent) == 2
@@ -0,0 +1,117 @@
+"""Zajedničko stanje servera: live podaci i snimanje leta.
+
+Stanje menjaju senzor thread (svako merenje) i Socket.IO handler-i
+(start/stop leta), a čitaju ga REST endpoint-i i slanje klijentima.
+
+- Live podaci su nepromenljiv dict koji se zamenjuje celim, pa čitaoci
+  (`live`) uzimaju snapshot bez zaključavanja.
+- Merenje se u trasu i statistike leta dodaje pod `_lock`, pa se ne može
+  desiti da se upiše u let koji je upravo zaustavljen ili u polu-resetovane
+  statistike.
+- Start i stop su serijalizovani posebnim `_transition_lock`-om, tako da
+  sporo otvaranje/zatvaranje fajla trase ne zadržava senzor thread.
+"""
+
+import threading
+
+
+def empty_flight_stats():
+    return {
+        "max_altitude": 0,
+        "min_altitude": float('inf'),
+        "max_climb_rate": 0,
+        "max_sink_rate": 0,
+        "data_points": 0,
+        "temp_sum": 0
+    }
+
+
+def add_to_flight_stats(stats, altitude, climb_rate, temperature):
+    """Dodaj merenje u statistike (za let u toku i za let oporavljen iz trase)"""
+    stats["max_altitude"] = max(stats["max_altitude"], altitude)
+    stats["min_altitude"] = min(stats["min_altitude"], altitude)
+    stats["max_climb_rate"] = max(stats["max_climb_rate"], climb_rate)
+    stats["max_sink_rate"] = min(stats["max_sink_rate"], climb_rate)
+    stats["data_points"] += 1
+    stats["temp_sum"] += temperature
+
+
+class Flight:
+    """Let koji se snima: početak, trasa i statistike"""
+
+    def __init__(self, start_time, writer):
+        self.start_time = start_time
+        self.writer = writer
+        self.stats = empty_flight_stats()
+
+    def add(self, sample, altitude, climb_rate):
+        if self.writer is not None:
+            self.writer.append(sample.timestamp, sample.pressure, sample.temperature,
+                               altitude, climb_rate)
+
+        add_to_flight_stats(self.stats, altitude, climb_rate, sample.temperature)
+
+
+class VarioState:
+    """Live podaci i let u toku, bezbedno za više thread-ova"""
+
+    def __init__(self, initial_data):
+        self._live = initial_data
+        self._flight = None
+        self._lock = threading.Lock()
+        self._transition_lock = threading.Lock()
+
+    @property
+    def live(self):
+        """Poslednji objavljeni podaci (ne menjati vraćeni dict)"""
+        return self._live
+
+    def publish(self, data):
+        """Objavi nove live podatke; `data` se posle toga ne sme menjati"""
+        self._live = data
+
+    @property
+    def recording(self):
+        return self._flight is not None
+
+    @property
+    def flight_start_time(self):
+        flight = self._flight
+        return flight.start_time if flight is not None else None
+
+    def record(self, sample, altitude, climb_rate):
+        """Dodaj merenje u let u toku, ako ga ima; vraća True ako je dodato"""
+        if self._flight is None:
+            return False
+        with self._lock:
+            if self._flight is not None:
+                self._flight.add(sample, altitude, climb_rate)
+                return True
+        return False
+
+    def start_flight(self, start_time, open_writer):
+        """Započni let ako nijedan nije u toku; vraća True ako je započet.
+
+        `open_writer()` otvara fajl trase i poziva se samo ako let zaista
+        počinje, van `_lock`-a.
+        """
+        with self._transition_lock:
+            if self._flight is not None:
+                return False
+            flight = Flight(start_time, open_writer())
+            with self._lock:
+                self._flight = flight
+            return True
+
+    def stop_flight(self):
+        """Završi let u toku; vraća završeni `Flight` ili None.
+
+        Posle izlaska iz `_lock`-a nijedno merenje više ne ulazi u vraćeni
+        let, pa su statistike i trasa konačne i mogu se sačuvati.
+        """
+        with self._transition_lock:
+            with self._lock:
+                flight, self._flight = self._flight, None
+            if flight is not None and flight.writer is not None:
+                flight.writer.close()
+            return flight
@@ -1,38 +1,129 @@
+import os
+
+# Produkcioni async server (gevent ili eventlet) mora da zakrpi standardnu
+# biblioteku pre svih ostalih import-a; `threading` je Werkzeug dev server
+ASYNC_MODE = os.environ.get('VARIO_ASYNC_MODE', 'threading')
+if ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+elif ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+from health import BootTimeline, network_state
 
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+# Vremena pokretanja za /readyz (od uključivanja RPi-ja, vidi health.py)
+boot = BootTimeline()
+
+from flask import Flask, Response, render_template, request, jsonify, send_file
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import time
-import board
-import busio
-import adafruit_bmp3xx
-import threading
 import json
+import subprocess
+import sys
+import tempfile
+import threading
 import datetime
-import os
 import pytz
+from collections import deque
+
+import flight_analysis
+import flight_sync
+import flight_track
+import metrics
+from climb_filter import ClimbRateFilter
+from flight_catalog import FlightCatalog, flight_record
+from flight_detector import LANDING, TAKEOFF, FlightDetector, ModeUsage
+from live_history import LiveHistory
+from scheduler import DeadlineScheduler
+from sensor_source import create_source
+from static_assets import AssetStore
+from telemetry import Reading, TelemetryHub
+from vario_state import VarioState
+
+boot.mark('imports')
 
-app = Flask(__name__)
+app = Flask(__name__, static_folder=None)
 app.config['SECRET_KEY'] = 'variometer_secret'
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
+
+# Senzor (BMP390, simulacija ili replay - vidi sensor_source.create_source).
+# Otvara ga petlja akvizicije, sa ponovnim pokušajima, da server sluša odmah
+sensor = None
+sensor_status = {"state": "starting", "attempts": 0, "error": None}
+SENSOR_RETRY_DELAYS = (0.1, 0.25, 0.5, 1.0, 2.0)  # posle poslednjeg se ponavlja
+MIN_PRESSURE, MAX_PRESSURE = 300.0, 1100.0        # hPa, opseg BMP390
+HEARTBEAT_TIMEOUT = 5.0  # s bez prolaza petlje - /healthz javlja grešku
+READY_SAMPLE_AGE = 5.0   # s od poslednjeg merenja - /readyz javlja da nije spreman
+HOTSPOT_ADDRESS = os.environ.get('VARIO_HOTSPOT_ADDRESS', '192.168.4.1')
+
+# Akvizicija i slanje klijentima rade nezavisno, svaka svojom frekvencijom
+SAMPLE_RATE = float(os.environ.get('VARIO_SAMPLE_HZ', '25'))
+BROADCAST_RATE = float(os.environ.get('VARIO_BROADCAST_HZ', '2'))
+FIFO_POLL_INTERVAL = 0.2  # sekunde između pražnjenja FIFO-a
+TELEMETRY_TICK = 0.05     # sekunde između provera batch telemetrije
+LEGACY_ROOM = 'sensor_data'  # klijenti koji nisu prijavljeni na batch telemetriju
+
+# Automatski start/stop snimanja i štednja baterije na zemlji (flight_detector.py):
+# posle IDLE_AFTER sekundi mirovanja senzor, petlje i slanje rade ređe
+AUTO_FLIGHT = os.environ.get('VARIO_AUTO_FLIGHT', '1') == '1'
+IDLE_AFTER = float(os.environ.get('VARIO_IDLE_AFTER', '120'))
+IDLE_SAMPLE_RATE = 2.0  # BMP390 ne ide ispod traženog: najbliži ODR je 3.125 Hz
+IDLE_BROADCAST_RATE = 0.5
+IDLE_POLL_INTERVAL = 1.0
+IDLE_TELEMETRY_TICK = 0.5
+
+# Web interfejs, učitan pri startu; kompresuje se u pozadini (startup_tasks)
+assets = AssetStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'),
+                    compress=False)
+
+FLIGHTS_DIR = os.environ.get('VARIO_FLIGHTS_DIR', '/home/milaogi/flights')
+TRACK_DEFAULT_POINTS = 1000
+TRACK_MAX_POINTS = 20000
+FLIGHTS_MAX_PER_PAGE = 200
+
+# Indeks letova za /api/flights (ažurira se u save_flight/delete_flight)
+catalog = FlightCatalog(FLIGHTS_DIR)
+
+# Analize termala po trasi (ponovo se računaju samo ako se trasa promeni)
+analysis_cache = flight_analysis.AnalysisCache()
+
+# Paketi novih/promenjenih letova za aplikaciju (vidi flight_sync.py)
+sync_bundles = flight_sync.FlightSync(FLIGHTS_DIR, catalog, pause=lambda: socketio.sleep(0))
+
+# Ponovna obrada arhive radi u posebnom procesu (vidi reprocess.py)
+reprocess_job = None
+reprocess_output = None  # privremeni fajl: pipe bi se napunio i zaustavio proces
+reprocess_result = None
 
-# BMP390 setup
-i2c = busio.I2C(board.SCL, board.SDA)
-bmp = adafruit_bmp3xx.BMP3XX_I2C(i2c)
-bmp.sea_level_pressure = 1013.25
+# Ring buffer poslednjih merenja (Reading) - 60 s pri punoj frekvenciji
+sample_buffer = deque(maxlen=int(SAMPLE_RATE * 60))
+sample_seq = 0
 
-# Global variables
-current_data = {
+# Istorija za klijente koji se povežu usred leta (vidi live_history.py):
+# 10 minuta pri punoj frekvenciji, unapred alocirano
+HISTORY_SECONDS = 600
+HISTORY_CONNECT_RATE = 1.0  # Hz, proređena istorija pri povezivanju
+live_history = LiveHistory(int(SAMPLE_RATE * HISTORY_SECONDS))
+
+epoch_anchor = None  # unix vreme - vreme izvora, postavlja se pri prvom merenju
+
+# Live podaci i let u toku (thread-safe, vidi vario_state.py)
+state = VarioState({
     "temperature": 0,
     "pressure": 0,
     "altitude": 0,
     "climb_rate": 0,
-    "timestamp": ""
-}
+    "seq": 0,  # redni broj merenja, za nastavak posle istorije
+    "timestamp": None  # vreme izvora; u Beogradsko vreme tek u live_data()
+})
+
+climb_filter = ClimbRateFilter()
 
-flight_recording = False
-flight_data = []
-flight_start_time = None
-altitude_history = []
+detector = FlightDetector(idle_after=IDLE_AFTER)
+power_mode = 'active'
+mode_usage = ModeUsage(power_mode)  # CPU po režimu, za /api/stats
+legacy_rate = BROADCAST_RATE
 
 BELGRADE_TZ = pytz.timezone('Europe/Belgrade')
 
@@ -40,371 +131,440 @@ def get_belgrade_time():
     """Dobij trenutno vreme u Beogradu"""
     return datetime.datetime.now(BELGRADE_TZ)
 
-def calculate_climb_rate():
-    """Kalkuliše brzinu penjanja/spuštanja"""
-    global altitude_history
+def sample_epoch(timestamp):
+    """Unix vreme merenja iz (monotonog) vremena izvora"""
+    return epoch_anchor + timestamp
+
+_live_cache = (None, None)
+
+def live_data():
+    """Live podaci za klijente, sa vremenom merenja u Beogradskom vremenu.
+
+    Senzor thread objavljuje monotono vreme izvora; pretvaranje u lokalno
+    vreme (pytz, isoformat) radi se ovde, najviše jednom po objavljenom
+    snapshot-u, a ne za svako merenje.
+    """
+    global _live_cache
+    live = state.live
+    cached_live, cached = _live_cache
+    if cached_live is not live:
+        timestamp = live["timestamp"]
+        cached = dict(live, timestamp="" if timestamp is None else
+                      datetime.datetime.fromtimestamp(sample_epoch(timestamp), BELGRADE_TZ).isoformat())
+        _live_cache = (live, cached)
+    return cached
+
+def emit_to_client(event, data, sid, callback):
+    socketio.emit(event, data, to=sid, callback=callback)
+
+telemetry = TelemetryHub(emit_to_client, sample_epoch, SAMPLE_RATE)
+
+# Metrike za /metrics: gde se gubi vreme - magistrala, filter ili mreža
+PROFILING_ENABLED = os.environ.get('VARIO_PROFILE', '0') == '1'
+registry = metrics.Registry()
+i2c_read_time = registry.histogram(
+    'vario_i2c_read_seconds', "Time on the sensor bus per FIFO read")
+filter_time = registry.histogram(
+    'vario_filter_seconds', "Climb rate filter time per sample")
+track_write_time = registry.histogram(
+    'vario_track_write_seconds', "Time to append a sample to the flight track and stats")
+loop_jitter = {loop: registry.histogram(
+    'vario_loop_jitter_seconds', "Loop start delay after its deadline", loop=loop)
+    for loop in ('acquisition', 'broadcast')}
+loop_work = {loop: registry.histogram(
+    'vario_loop_work_seconds', "Work time per loop iteration", loop=loop)
+    for loop in ('acquisition', 'broadcast')}
+emit_time = {kind: registry.histogram(
+    'vario_emit_seconds', "Fan-out time per broadcast", kind=kind)
+    for kind in ('legacy', 'telemetry')}
+samples_total = registry.counter('vario_samples_total', "Samples read from the sensor")
+track_records_total = registry.counter('vario_track_records_total', "Samples written to flight tracks")
+errors_total = {loop: registry.counter('vario_errors_total', "Exceptions in server loops", loop=loop)
+                for loop in ('acquisition', 'broadcast')}
+registry.counter('vario_fifo_overflows_total', "Sensor FIFO overflows (samples lost)",
+                 lambda: getattr(sensor, 'fifo_overflows', 0))
+registry.counter('vario_telemetry_frames_total', "Telemetry frames sent",
+                 lambda: telemetry.frames_sent)
+registry.counter('vario_telemetry_dropped_samples_total', "Samples skipped for slow telemetry clients",
+                 lambda: telemetry.samples_dropped)
+for loop in ('acquisition', 'broadcast'):
+    registry.counter('vario_loop_overruns_total', "Loop iterations that missed a whole period",
+                     lambda loop=loop: loop_schedulers[loop].overruns, loop=loop)
+# Handler-i connect/disconnect u `threading` modu rade u različitim thread-ovima
+connected_sids = set()
+connected_lock = threading.Lock()
+registry.gauge('vario_connected_clients', "Connected Socket.IO clients", lambda: len(connected_sids))
+registry.gauge('vario_subscribed_clients', "Clients subscribed to batch telemetry", lambda: len(telemetry))
+registry.gauge('vario_recording', "1 while a flight is being recorded", lambda: int(state.recording))
+registry.gauge('vario_power_idle', "1 while idle on the ground (reduced rates)",
+               lambda: int(power_mode == 'idle'))
+
+def calculate_climb_rate(timestamp, current_alt):
+    """Kalkuliše filtriranu visinu i brzinu penjanja/spuštanja"""
     try:
-        current_alt = bmp.altitude
-    
-    # Dodaj u istoriju (drži poslednih 5 merenja za smooth-ovanje)
-        altitude_history.append(current_alt)
-        if len(altitude_history) > 5:
-            altitude_history.pop(0)
-    
-    # Kalkuliraj prosečnu brzinu promene
-        if len(altitude_history) >= 2:
-        # Brzina promene u metrima po sekundi (merimo svakih 0.5s)
-            time_diff = 0.5 * (len(altitude_history) - 1)
-            alt_diff = altitude_history[-1] - altitude_history[0]
-            climb_rate = alt_diff / time_diff if time_diff > 0 else 0
-        
-        # Zaokruži na 1 decimalu
-            return round(climb_rate, 1)
-    
-        return 0.0
+        start = time.perf_counter()
+        altitude, climb_rate, _ = climb_filter.update(timestamp, current_alt)
+        filter_time.observe(time.perf_counter() - start)
+        return altitude, climb_rate
     except Exception as e:
-        print(f"BMP390 read error: {e}")
-        return 0.0 
+        print(f"Climb rate error: {e}")
+        climb_filter.reset()
+        return current_alt, 0.0
+
+def open_sensor(rate):
+    """Otvori senzor, proveri ga jednim merenjem i podesi na `rate` Hz.
+
+    Pokušava dok sve ne uspe (i podešavanje FIFO-a može da padne na I2C
+    greški odmah posle uključivanja); vraća stvarnu frekvenciju.
+    """
+    global sensor
+    while True:
+        sensor_status["attempts"] += 1
+        loop_heartbeat['acquisition'] = time.monotonic()
+        try:
+            source = create_source()
+            sample = source.read()
+            if sample is not None and not MIN_PRESSURE <= sample.pressure <= MAX_PRESSURE:
+                raise ValueError(f"Implausible pressure {sample.pressure:.1f} hPa")
+            actual_rate = source.configure(rate)
+        except Exception as e:
+            errors_total['acquisition'].inc()
+            delay = SENSOR_RETRY_DELAYS[min(sensor_status["attempts"], len(SENSOR_RETRY_DELAYS)) - 1]
+            sensor_status.update(state="retrying", error=f"{type(e).__name__}: {e}")
+            print(f"Sensor not available (attempt {sensor_status['attempts']}): {e}")
+            socketio.sleep(delay)
+            continue
+
+        sensor = source
+        sensor_status.update(state="ok", error=None)
+        boot.mark('sensor_open')
+        return actual_rate
 
 def read_sensor():
-    """Background thread za čitanje senzora"""
-    global current_data, flight_recording
-    
+    """Background thread za akviziciju - prazni FIFO senzora u ring buffer"""
+    global sample_seq, epoch_anchor, last_sample_at
+
+    rate = open_sensor(SAMPLE_RATE)
+    telemetry.set_sample_rate(rate)
+    acquisition_scheduler.set_period(FIFO_POLL_INTERVAL / sensor.speedup)
+    print(f"Sensor sampling at {rate} Hz")
+
     while True:
+        acquisition_scheduler.wait()
+        loop_heartbeat['acquisition'] = time.monotonic()
+        loop_jitter['acquisition'].observe(acquisition_scheduler.last_jitter_ns / 1e9)
+        work_start = time.perf_counter()
         try:
-            climb_rate = calculate_climb_rate()
-            
-            current_data = {
-                "temperature": round(bmp.temperature, 1),
-                "pressure": round(bmp.pressure, 1),
-                "altitude": round(bmp.altitude, 1),
-                "climb_rate": climb_rate,
-                "timestamp": get_belgrade_time().isoformat()
-            }
-            
-            # Ako je let u toku, ažuriraj statistike
-            if flight_recording:
-                update_flight_stats(current_data)
-            
-            # Pošalji podatke svim povezanim klijentima
-            socketio.emit('sensor_data', current_data)
-            
+            samples = sensor.read_batch()
+            i2c_read_time.observe(sensor.bus_stats.last)
+            samples_total.inc(len(samples))
+            if samples and epoch_anchor is None:
+                epoch_anchor = time.time() - samples[-1].timestamp
+                boot.mark('first_sample')
+            if samples:
+                last_sample_at = time.monotonic()
+
+            for sample in samples:
+                altitude, climb_rate = calculate_climb_rate(sample.timestamp, sample.altitude)
+                sample_seq += 1
+                sample_buffer.append(Reading(sample_seq, sample, altitude, climb_rate))
+                live_history.append(sample_seq, sample.timestamp, altitude, climb_rate,
+                                    sample.pressure, sample.temperature)
+
+                # Ako je let u toku, zapiši merenje u trasu i ažuriraj statistike
+                write_start = time.perf_counter()
+                if state.record(sample, altitude, climb_rate):
+                    track_write_time.observe(time.perf_counter() - write_start)
+                    track_records_total.inc()
+
+                if AUTO_FLIGHT:
+                    event = detector.update(sample.timestamp, altitude, climb_rate)
+                    if event == TAKEOFF:
+                        auto_start_flight(detector.takeoff_timestamp)
+                    elif event == LANDING:
+                        end_flight(datetime.datetime.fromtimestamp(sample_epoch(sample.timestamp), BELGRADE_TZ))
+
+            if samples:
+                seq, sample, altitude, climb_rate = sample_buffer[-1]
+                state.publish({
+                    "temperature": round(sample.temperature, 1),
+                    "pressure": round(sample.pressure, 1),
+                    "altitude": round(altitude, 1),
+                    "climb_rate": round(climb_rate, 1),
+                    "seq": seq,
+                    "timestamp": sample.timestamp
+                })
+
+            if AUTO_FLIGHT:
+                set_power_mode('idle' if detector.idle and not state.recording else 'active')
+
         except Exception as e:
+            errors_total['acquisition'].inc()
             print(f"Sensor error: {e}")
-        
-        time.sleep(2.0)
+        loop_work['acquisition'].observe(time.perf_counter() - work_start)
+
+def set_power_mode(mode):
+    """Prebaci senzor i petlje na frekvencije režima `active` ili `idle`"""
+    global power_mode, legacy_rate
+    if mode == power_mode:
+        return
+    mode_usage.switch(mode)
+    power_mode = mode
+
+    idle = mode == 'idle'
+    rate = sensor.configure(IDLE_SAMPLE_RATE if idle else SAMPLE_RATE)
+    telemetry.set_sample_rate(rate)
+    acquisition_scheduler.set_period((IDLE_POLL_INTERVAL if idle else FIFO_POLL_INTERVAL) / sensor.speedup)
+    broadcast_scheduler.set_period(IDLE_TELEMETRY_TICK if idle else TELEMETRY_TICK)
+    legacy_rate = IDLE_BROADCAST_RATE if idle else BROADCAST_RATE
+    print(f"Power mode {mode}: sensor sampling at {rate} Hz")
 
-# Pokreni sensor thread
-sensor_thread = threading.Thread(target=read_sensor, daemon=True)
-sensor_thread.start()
+def broadcast_data():
+    """Background thread koji šalje podatke klijentima.
+
+    Klijenti koji nisu prijavljeni na batch telemetriju dobijaju poslednje
+    merenje kao `sensor_data` frekvencijom BROADCAST_RATE, a prijavljeni
+    `telemetry` poruke frekvencijom koju su dogovorili.
+    """
+    next_legacy = time.monotonic_ns()
+    while True:
+        now = broadcast_scheduler.wait()
+        loop_heartbeat['broadcast'] = time.monotonic()
+        legacy_interval = round(1e9 / legacy_rate)
+        loop_jitter['broadcast'].observe(broadcast_scheduler.last_jitter_ns / 1e9)
+        work_start = time.perf_counter()
+        try:
+            if now >= next_legacy:
+                next_legacy += legacy_interval
+                if next_legacy <= now:
+                    next_legacy = now + legacy_interval
+                socketio.emit('sensor_data', live_data(), to=LEGACY_ROOM)
+                emit_time['legacy'].observe(time.perf_counter() - work_start)
+
+            if len(telemetry):
+                # Kopija deque-a je atomična, pa senzor thread može da nastavi da dodaje
+                tick_start = time.perf_counter()
+                telemetry.tick(list(sample_buffer), now / 1e9)
+                emit_time['telemetry'].observe(time.perf_counter() - tick_start)
+        except Exception as e:
+            errors_total['broadcast'].inc()
+            print(f"Broadcast error: {e}")
+        loop_work['broadcast'].observe(time.perf_counter() - work_start)
+
+# Rokovi petlji u stvarnom vremenu (izvor može biti ubrzan, vidi VARIO_SPEEDUP)
+acquisition_scheduler = DeadlineScheduler(FIFO_POLL_INTERVAL, socketio.sleep)
+broadcast_scheduler = DeadlineScheduler(TELEMETRY_TICK, socketio.sleep)
+loop_schedulers = {'acquisition': acquisition_scheduler, 'broadcast': broadcast_scheduler}
+loop_heartbeat = {name: time.monotonic() for name in loop_schedulers}
+last_sample_at = None
+
+# Pokreni akviziciju i slanje (thread-ovi ili greenlet-i, zavisno od ASYNC_MODE)
+sensor_thread = socketio.start_background_task(read_sensor)
+broadcast_thread = socketio.start_background_task(broadcast_data)
 
 @app.route('/')
 def index():
     """Glavna web stranica"""
-    return '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Variometar Live</title>
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.0/socket.io.js"></script>
-        <style>
-            body { 
-                font-family: Arial; margin: 20px; background: #1a1a1a; color: white;
-                padding-bottom: 120px;
-            }
-            .tabs {
-                display: flex; background: #333; border-radius: 10px; margin-bottom: 20px;
-            }
-            .tab {
-                flex: 1; padding: 15px; text-align: center; cursor: pointer;
-                background: #555; border: none; color: white; font-size: 1em;
-            }
-            .tab.active { background: #4CAF50; }
-            .tab:first-child { border-radius: 10px 0 0 10px; }
-            .tab:last-child { border-radius: 0 10px 10px 0; }
-            
-            .tab-content { display: none; }
-            .tab-content.active { display: block; }
-            
-            .data-box { 
-                background: #333; padding: 20px; margin: 10px 0; 
-                border-radius: 10px; text-align: center;
-            }
-            .value { font-size: 2.5em; color: #4CAF50; margin: 10px 0; }
-            .climb-rate { font-size: 3em; font-weight: bold; }
-            .climb-up { color: #4CAF50; }
-            .climb-down { color: #f44336; }
-            .climb-stable { color: #ff9800; }
-            
-            .flight-list {
-                background: #333; padding: 20px; border-radius: 10px;
-                max-height: 400px; overflow-y: auto;
-            }
-            .flight-item {
-                background: #444; padding: 15px; margin: 10px 0; border-radius: 8px;
-                cursor: pointer; transition: background 0.2s;
-                display: flex; justify-content: space-between; align-items: center;
-            }
-            .flight-item:hover { background: #555; }
-            .flight-info { flex: 1; }
-            .flight-header { font-weight: bold; color: #4CAF50; }
-            .flight-details { color: #ccc; font-size: 0.9em; margin-top: 5px; }            
-            .delete-btn {
-                background: #f44336; color: white; border: none; padding: 8px 12px;
-                border-radius: 5px; cursor: pointer; font-size: 0.8em;
-                margin-left: 10px;
-            }
-            .delete-btn:hover { background: #d32f2f; }
-
-            .controls { 
-                position: fixed; bottom: 20px; left: 20px; right: 20px;
-                display: flex; gap: 10px;
-            }
-            .btn { 
-                flex: 1; padding: 15px; font-size: 1.2em; border: none; 
-                border-radius: 8px; cursor: pointer; font-weight: bold;
-            }
-            .start-btn { background: #4CAF50; color: white; }
-            .stop-btn { background: #f44336; color: white; }
-            .disabled { background: #666; cursor: not-allowed; }
-            .recording { background: #ff9800; animation: pulse 1s infinite; }
-            @keyframes pulse { 0% { opacity: 1; } 50% { opacity: 0.5; } 100% { opacity: 1; } }
-        </style>
-    </head>
-    <body>
-        <h1>Variometar</h1>
-        
-        <div class="tabs">
-            <button class="tab active" onclick="showTab('live')">Podaci Uživo</button>
-            <button class="tab" onclick="showTab('flights')">Snimljeni Letovi</button>
-        </div>
-        
-        <div id="live-content" class="tab-content active">
-            <div class="data-box">
-                <h3>Brzina Penjanja/Spuštanja</h3>
-                <div class="value climb-rate" id="climb_rate">--</div>
-                <span>m/s</span>
-            </div>
-            
-            <div class="data-box">
-                <h3>Visina</h3>
-                <div class="value" id="altitude">--</div>
-                <span>m</span>
-            </div>
-            
-            <div class="data-box">
-                <h3>Pritisak</h3>
-                <div class="value" id="pressure">--</div>
-                <span>hPa</span>
-            </div>
-            
-            <div class="data-box">
-                <h3>Temperatura</h3>
-                <div class="value" id="temperature">--</div>
-                <span>°C</span>
-            </div>
-        </div>
-        
-        <div id="flights-content" class="tab-content">
-            <div class="flight-list" id="flightList">
-                <div style="text-align: center; color: #666;">
-                    Učitavam letove...
-                </div>
-            </div>
-        </div>
-        
-        <div class="controls">
-            <button class="btn start-btn" id="startBtn" onclick="startFlight()">
-                ✈️ POKRENI LET
-            </button>
-            <button class="btn stop-btn disabled" id="stopBtn" onclick="stopFlight()">
-                🛑 ZAVRŠI LET
-            </button>
-        </div>
-        
-        <script>
-            const socket = io();
-            let recording = false;
-            
-            socket.on('sensor_data', function(data) {
-                document.getElementById('temperature').textContent = data.temperature;
-                document.getElementById('pressure').textContent = data.pressure;
-                document.getElementById('altitude').textContent = data.altitude;
-                
-                // Climb rate sa bojama
-                const climbRate = data.climb_rate;
-                const climbElement = document.getElementById('climb_rate');
-                climbElement.textContent = climbRate > 0 ? '+' + climbRate : climbRate;
-                
-                // Oboji na osnovu brzine
-                climbElement.className = 'value climb-rate ';
-                if (climbRate > 0.2) {
-                    climbElement.className += 'climb-up';
-                } else if (climbRate < -0.2) {
-                    climbElement.className += 'climb-down';
-                } else {
-                    climbElement.className += 'climb-stable';
-                }
-            });
-            
-            socket.on('flight_started', function() {
-                recording = true;
-                document.getElementById('startBtn').className = 'btn recording';
-                document.getElementById('startBtn').textContent = '🔴 SNIMAM...';
-                document.getElementById('stopBtn').className = 'btn stop-btn';
-            });
-            
-            socket.on('flight_stopped', function(data) {
-                recording = false;
-                document.getElementById('startBtn').className = 'btn start-btn';
-                document.getElementById('startBtn').textContent = '✈️ POKRENI LET';
-                document.getElementById('stopBtn').className = 'btn stop-btn disabled';
-                
-                // Osvežava listu letova
-                loadFlights();
-            });
-            
-            function showTab(tabName) {
-                // Sakrij sve tab-ove
-                document.querySelectorAll('.tab-content').forEach(tab => {
-                    tab.classList.remove('active');
-                });
-                document.querySelectorAll('.tab').forEach(tab => {
-                    tab.classList.remove('active');
-                });
-                
-                // Prikaži selektovani tab
-                document.getElementById(tabName + '-content').classList.add('active');
-                event.target.classList.add('active');
-                
-                // Učitaj letove ako je flights tab
-                if (tabName === 'flights') {
-                    loadFlights();
-                }
-            }
-            
-            function loadFlights() {
-                fetch('/api/flights')
-                    .then(response => response.json())
-                    .then(flights => {
-                        const flightList = document.getElementById('flightList');
-                        
-                        if (flights.length === 0) {
-                            flightList.innerHTML = '<div style="text-align: center; color: #666;">Nema snimljenih letova</div>';
-                            return;
-                        }
-                        
-                        flightList.innerHTML = flights.map(filename => {
-                            const parts = filename.replace('.json', '').split('_');
-                            const date = parts[1];
-                            const time = parts[2];
-                            
-                            const formattedDate = date.substring(0,4) + '-' + date.substring(4,6) + '-' + date.substring(6,8);
-                            const formattedTime = time.substring(0,2) + ':' + time.substring(2,4) + ':' + time.substring(4,6);
-                            
-                            return `
-                                <div class="flight-item">
-                                    <div class="flight-info" onclick="viewFlight('${filename}')">
-                                        <div class="flight-header">${formattedDate} ${formattedTime}</div>
-                                        <div class="flight-details">Klikni za detalje</div>
-                                    </div>
-                                    <button class="delete-btn" onclick="deleteFlight('${filename}'); event.stopPropagation();">
-                                        🗑️ Obriši
-                                    </button>
-                                </div>
-                            `;
-                        }).join('');
-                    })
-                    .catch(error => {
-                        document.getElementById('flightList').innerHTML = 
-                            '<div style="text-align: center; color: #f44336;">Greška pri učitavanju letova</div>';
-                    });
-            }
-            
-            function viewFlight(filename) {
-                fetch(`/api/flight/${filename}`)
-                    .then(response => response.json())
-                    .then(flight => {
-                        const duration = Math.round(flight.duration_seconds / 60);
-                        const altGain = flight.max_altitude - flight.min_altitude;
-                        
-                        const startTime = new Date(flight.start_time);
-                        const formattedDateTime = startTime.toLocaleString('sr-RS', {
-                            year: 'numeric',
-                            month: '2-digit', 
-                            day: '2-digit',
-                            hour: '2-digit',
-                            minute: '2-digit',
-                            hour12: false
-                        });
-                        
-                        alert(`Detalji Leta:\\n\\nDatum: ${formattedDateTime}\\nTrajanje: ${duration} min\\nMax visina: ${flight.max_altitude.toFixed(1)}m\\nMin visina: ${flight.min_altitude.toFixed(1)}m\\nVisinska razlika: ${altGain.toFixed(1)}m\\nMax penjanje: ${flight.max_climb_rate.toFixed(1)} m/s\\nMax spuštanje: ${flight.max_sink_rate.toFixed(1)} m/s\\nProsečna temperatura: ${flight.avg_temperature.toFixed(1)} °C`);
-                    })
-	        .catch(error => {
-	            console.error('Error:', error);
-	            alert('Greška pri učitavanju leta');
-	        });
-            }
-
-	    function deleteFlight(filename) {
-                if (!confirm('Da li si siguran da želiš da obrišeš ovaj let?')) {
-                    return;
-                }
-    
-                fetch(`/api/flight/${filename}`, { method: 'DELETE' })
-                    .then(response => response.json())
-                    .then(result => {
-                        if (result.success) {
-                            loadFlights(); // Osvežava listu
-                        } else {
-                            alert('Greška pri brisanju leta');
-                        }
-                    })
-	            .catch(error => {
-	                console.error('Error:', error);
-	                alert('Greška pri brisanju leta');
-	            });
-            }
-	            
-            function startFlight() {
-                if (!recording) {
-                    socket.emit('start_flight');
-                }
-            }
-            
-            function stopFlight() {
-                if (recording) {
-                    socket.emit('stop_flight');
-                }
-            }
-        </script>
-    </body>
-    </html>
-    '''
+    return assets.response('index.html', request)
+
+@app.route('/static/<path:name>')
+def static_asset(name):
+    """CSS, JS i Socket.IO klijent (bez CDN-a, radi i na hotspot-u bez interneta)"""
+    return assets.response(name, request)
 
 @app.route('/api/data')
 def get_data():
     """API endpoint za trenutne podatke"""
-    return jsonify(current_data)
+    return jsonify(live_data())
+
+@app.route('/api/stats')
+def get_stats():
+    """Vreme čitanja senzora po merenju i tačnost perioda petlji"""
+    return jsonify({
+        "sensor_bus": sensor.bus_stats.as_dict() if sensor is not None else None,
+        "acquisition_loop": acquisition_scheduler.as_dict(),
+        "broadcast_loop": broadcast_scheduler.as_dict(),
+        "flight_phase": detector.state if AUTO_FLIGHT else None,
+        "power_mode": power_mode,
+        "power_modes": mode_usage.as_dict()
+    })
+
+@app.route('/healthz')
+def get_health():
+    """Liveness: obe petlje rade (i dok se senzor još otvara)"""
+    now = time.monotonic()
+    loops = {name: round(now - at, 3) for name, at in loop_heartbeat.items()}
+    healthy = all(age < HEARTBEAT_TIMEOUT for age in loops.values())
+    return jsonify({
+        "status": "ok" if healthy else "stalled",
+        "loop_age_s": loops,
+        "sensor": sensor_status["state"]
+    }), 200 if healthy else 503
+
+@app.route('/readyz')
+def get_readiness():
+    """Readiness: senzor je otvoren i merenja stižu; uz stanje mreže i vremena pokretanja"""
+    sample_age = None if last_sample_at is None else round(time.monotonic() - last_sample_at, 3)
+    ready = sample_age is not None and sample_age < READY_SAMPLE_AGE
+    return jsonify({
+        "ready": ready,
+        "sensor": dict(sensor_status, last_sample_age_s=sample_age,
+                       rate_hz=getattr(sensor, 'rate', None)),
+        "network": dict(network_state(HOTSPOT_ADDRESS), clients=len(connected_sids)),
+        "boot": boot.as_dict()
+    }), 200 if ready else 503
+
+@app.route('/metrics')
+def get_metrics():
+    """Brojači i histogrami u Prometheus tekstualnom formatu"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profile')
+def get_profile():
+    """Sampling profil svih thread-ova/greenlet-a (samo uz VARIO_PROFILE=1).
+
+    Query parametri:
+      seconds - trajanje uzorkovanja (podrazumevano 10, najviše 60)
+    Vraća "collapsed stack" tekst (flamegraph.pl, speedscope).
+    """
+    if not PROFILING_ENABLED:
+        return jsonify({"error": "Profiling disabled (set VARIO_PROFILE=1)"}), 404
+    seconds = min(max(request.args.get('seconds', 10.0, type=float), 0.1), 60.0)
+    sampler = metrics.StackSampler(seconds).start()
+    while not sampler.done:
+        socketio.sleep(0.1)
+    return Response(sampler.collapsed(), mimetype='text/plain',
+                    headers={'X-Profile-Samples': str(sampler.samples)})
+
+@app.route('/api/live/history')
+def get_live_history():
+    """Merenja iz poslednjih 10 minuta (vidi live_history.py).
+
+    Query parametri:
+      since  - poslednji seq koji klijent ima (podrazumevano 0 - sva)
+      stride - svako N-to merenje (podrazumevano 1)
+    """
+    since = request.args.get('since', 0, type=int)
+    stride = request.args.get('stride', 1, type=int)
+    if since < 0 or stride < 1:
+        return jsonify({"error": "Invalid history query"}), 400
+    return jsonify(live_history.frame(since, sample_epoch, stride=stride))
 
 @app.route('/api/flights')
 def get_flights():
-    """Lista svih snimljenih letova"""
-    flights = []
-    flights_dir = '/home/milaogi/flights'
-    
-    if os.path.exists(flights_dir):
-        for filename in os.listdir(flights_dir):
-            if filename.endswith('.json'):
-                flights.append(filename)
-    
-    return jsonify(flights)
+    """Lista snimljenih letova sa statistikama, iz kataloga.
+
+    Query parametri:
+      page, per_page - paginacija (podrazumevano 1 i 50)
+      sort           - start_time, duration_seconds, max_altitude,
+                       max_climb_rate ili altitude_gain
+      order          - asc ili desc (podrazumevano desc)
+      from, to       - datumi YYYY-MM-DD (po beogradskom vremenu, uključivo)
+    """
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 50)), 1), FLIGHTS_MAX_PER_PAGE)
+        date_from = parse_date_arg('from')
+        date_to = parse_date_arg('to', end_of_day=True)
+        total, flights = catalog.query(page, per_page,
+                                       sort=request.args.get('sort', 'start_time'),
+                                       order=request.args.get('order', 'desc'),
+                                       date_from=date_from, date_to=date_to)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "flights": flights,
+        "total": total,
+        "page": page,
+        "per_page": per_page
+    })
+
+def parse_date_arg(name, end_of_day=False):
+    """Query parametar YYYY-MM-DD kao unix vreme ponoći u Beogradu.
+
+    Sa `end_of_day` vraća ponoć sledećeg dana (kraj uključivog perioda);
+    dan promene letnjeg vremena traje 23 ili 25 sati, pa ne `+ 24 * 3600`.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    date = datetime.datetime.strptime(value, '%Y-%m-%d')
+    if end_of_day:
+        date += datetime.timedelta(days=1)
+    return BELGRADE_TZ.localize(date).timestamp()
+
+@app.route('/api/season')
+def get_season():
+    """Statistike sezone iz rezultata ponovne obrade letova.
+
+    Query parametri:
+      year     - godina (po beogradskom vremenu)
+      from, to - ili period, datumi YYYY-MM-DD (uključivo)
+    """
+    import reprocess  # tek pri prvom zahtevu, ne odlaže start servera
+    try:
+        year = request.args.get('year', type=int)
+        if year is not None:
+            date_from, date_to = reprocess.year_range(year)
+        else:
+            date_from = parse_date_arg('from')
+            date_to = parse_date_arg('to', end_of_day=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    season = reprocess.season_stats(catalog, date_from, date_to)
+    total, _ = catalog.query(per_page=1, date_from=date_from, date_to=date_to)
+    season["flights_not_reprocessed"] = total - season["flights"]
+    return jsonify(season)
+
+@app.route('/api/reprocess', methods=['POST'])
+def start_reprocess():
+    """Pokreni ponovnu obradu svih letova (`?force=1` i za nepromenjene)"""
+    global reprocess_job, reprocess_output, reprocess_result
+    if reprocess_job is not None and reprocess_job.poll() is None:
+        return jsonify({"success": False, "error": "Reprocessing already running"}), 409
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reprocess.py')
+    command = [sys.executable, script, FLIGHTS_DIR, '--json']
+    if request.args.get('force') in ('1', 'true'):
+        command.append('--force')
+    start_time = state.flight_start_time
+    if start_time is not None:
+        # Trasa leta koji se upravo snima još raste
+        command += ['--exclude', os.path.basename(track_path_for(flight_filename(start_time)))]
+
+    reprocess_result = None
+    if reprocess_output is not None:
+        reprocess_output.close()
+    reprocess_output = tempfile.TemporaryFile()
+    reprocess_job = subprocess.Popen(command, stdout=reprocess_output, stderr=subprocess.DEVNULL)
+    return jsonify({"success": True, "running": True}), 202
+
+@app.route('/api/reprocess')
+def get_reprocess_status():
+    """Stanje ponovne obrade i izveštaj poslednje završene"""
+    global reprocess_output, reprocess_result
+    if reprocess_job is None:
+        return jsonify({"running": False, "report": None})
+    if reprocess_job.poll() is None:
+        return jsonify({"running": True, "report": None})
+
+    if reprocess_result is None:
+        reprocess_output.seek(0)
+        output = reprocess_output.read()
+        reprocess_output.close()
+        reprocess_output = None
+        try:
+            reprocess_result = json.loads(output)["report"]
+        except (ValueError, KeyError):
+            reprocess_result = {"error": f"Reprocessing failed (exit code {reprocess_job.returncode})"}
+    return jsonify({"running": False, "report": reprocess_result})
 
 @app.route('/api/flight/<filename>')
 def get_flight_data(filename):
     """Dobij podatke određenog leta"""
-    flight_path = f'/home/milaogi/flights/{filename}'
+    flight_path = os.path.join(FLIGHTS_DIR, filename)
     
     if os.path.exists(flight_path):
         with open(flight_path, 'r') as f:
@@ -412,14 +572,170 @@ def get_flight_data(filename):
     else:
         return jsonify({"error": "Flight not found"}), 404
 
+@app.route('/api/flight/<filename>/track')
+def get_flight_track(filename):
+    """Trasa leta, smanjena na traženi broj tačaka.
+
+    Query parametri:
+      points  - najviše tačaka u odgovoru (podrazumevano 1000)
+      start   - početak prozora u sekundama od starta leta
+      end     - kraj prozora u sekundama od starta leta
+      channel - kanal čiji se min/max čuvaju (altitude, vario, pressure, temperature)
+      format  - `json` (kolone) ili `f32` (packed little-endian float32,
+                redovi: t, pressure, temperature, altitude, vario)
+    """
+    track_path = track_path_for(filename)
+    if not os.path.exists(track_path):
+        return jsonify({"error": "Track not found"}), 404
+
+    try:
+        points = min(int(request.args.get('points', TRACK_DEFAULT_POINTS)), TRACK_MAX_POINTS)
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        channel = request.args.get('channel', 'altitude')
+        fmt = request.args.get('format', 'json')
+        if channel not in flight_track.TRACK_COLUMNS[1:] or fmt not in ('json', 'f32') or points < 2:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "Invalid track query"}), 400
+
+    start_epoch, records = flight_track.map_track(track_path)
+    window = flight_track.select_window(records, start, end)
+    selected = flight_track.downsample_minmax(window, points, channel)
+    t = selected['offset_ms'] / 1000.0
+
+    import numpy as np
+    if fmt == 'f32':
+        rows = np.column_stack((t, selected['pressure'], selected['temperature'],
+                                selected['altitude'], selected['vario'])).astype('<f4')
+        return Response(rows.tobytes(), mimetype='application/octet-stream', headers={
+            'X-Track-Start': str(start_epoch),
+            'X-Track-Columns': 't,pressure,temperature,altitude,vario',
+            'X-Track-Total-Points': str(len(records))
+        })
+
+    def rounded(column, decimals):
+        # float32 zaokružen u float32 se u JSON-u ispisuje kao npr. 499.70001220703125
+        return selected[column].astype(np.float64).round(decimals).tolist()
+
+    return jsonify({
+        "start_time": datetime.datetime.fromtimestamp(start_epoch, BELGRADE_TZ).isoformat(),
+        "total_points": len(records),
+        "window_points": len(window),
+        "points": len(selected),
+        "t": t.round(3).tolist(),
+        "pressure": rounded('pressure', 2),
+        "temperature": rounded('temperature', 1),
+        "altitude": rounded('altitude', 1),
+        "vario": rounded('vario', 2)
+    })
+
+@app.route('/api/flight/<filename>/analysis')
+def get_flight_analysis(filename):
+    """Termali, klizanja i raspodela brzine penjanja (vidi flight_analysis.py)"""
+    track_path = track_path_for(filename)
+    if not os.path.exists(track_path):
+        return jsonify({"error": "Track not found"}), 404
+
+    try:
+        return jsonify(analysis_cache.get(track_path))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 422
+
+@app.route('/api/flight/<filename>/export')
+def export_flight(filename):
+    """Izvoz leta, strimovan iz trase (vidi flight_export.py).
+
+    Query parametri:
+      format   - igc, csv ili gpx
+      lat, lon - pozicija (poletište) za IGC/GPX, jer variometar nema GPS
+      pilot, glider - za IGC zaglavlje
+    """
+    track_path = track_path_for(filename)
+    if not os.path.exists(track_path):
+        return jsonify({"error": "Track not found"}), 404
+
+    import flight_export
+    fmt = request.args.get('format', 'igc')
+    try:
+        if fmt not in flight_export.FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        options = {}
+        if fmt in ('igc', 'gpx'):
+            options['latitude'] = request.args.get('lat', 0.0, type=float)
+            options['longitude'] = request.args.get('lon', 0.0, type=float)
+        if fmt == 'igc':
+            options['pilot'] = request.args.get('pilot', '')
+            options['glider'] = request.args.get('glider', '')
+        if fmt == 'gpx':
+            options['name'] = os.path.splitext(filename)[0]
+        with open(track_path, 'rb') as f:
+            flight_track.read_header(f)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    _, mimetype, extension = flight_export.FORMATS[fmt]
+    download_name = os.path.splitext(filename)[0] + extension
+    return Response(flight_export.export(track_path, fmt, **options), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{download_name}"'
+    })
+
+@app.route('/api/sync', methods=['POST'])
+def plan_sync():
+    """Letovi koje aplikacija nema ili su se promenili (vidi flight_sync.py).
+
+    Telo zahteva: {"have": {filename: heš}} - letovi koje aplikacija već ima
+    """
+    body = request.get_json(silent=True) or {}
+    have = body.get('have', {})
+    if not isinstance(have, dict) or not all(isinstance(h, str) for h in have.values()):
+        return jsonify({"error": "Invalid sync request"}), 400
+
+    bundle_id, entries, removed = sync_bundles.plan(have)
+    return jsonify({
+        "bundle": bundle_id,
+        "url": f"/api/sync/{bundle_id}{flight_sync.BUNDLE_EXTENSION}" if bundle_id else None,
+        "flights": [{"filename": filename, "hash": content_hash} for filename, content_hash in entries],
+        "removed": removed
+    })
+
+@app.route('/api/sync/<bundle_id>.tar.gz')
+def get_sync_bundle(bundle_id):
+    """Paket letova, strimovan dok se pravi; `Range`/`If-Range` za nastavak prekinutog prenosa"""
+    download_name = f"variometar_{bundle_id[:12]}{flight_sync.BUNDLE_EXTENSION}"
+    try:
+        path = sync_bundles.cached(bundle_id)
+        if path is None and request.range is not None:
+            # Nastavak posle prekinutog prvog prenosa: isti bajtovi, iz keša
+            path = sync_bundles.build(bundle_id)
+        chunks = None if path is not None else sync_bundles.stream(bundle_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+
+    if path is not None:
+        return send_file(path, mimetype='application/gzip', conditional=True, etag=bundle_id,
+                         download_name=download_name, as_attachment=True)
+    if chunks is None:
+        return jsonify({"error": "Unknown sync bundle, request /api/sync again"}), 404
+    return Response(chunks, mimetype='application/gzip', headers={
+        'ETag': f'"{bundle_id}"',
+        'Accept-Ranges': 'bytes',
+        'Content-Disposition': f'attachment; filename="{download_name}"'
+    })
+
 @app.route('/api/flight/<filename>', methods=['DELETE'])
 def delete_flight(filename):
     """Obriši let"""
-    flight_path = f'/home/milaogi/flights/{filename}'
+    flight_path = os.path.join(FLIGHTS_DIR, filename)
     
     try:
         if os.path.exists(flight_path):
             os.remove(flight_path)
+            track_path = track_path_for(filename)
+            if os.path.exists(track_path):
+                os.remove(track_path)
+            analysis_cache.discard(track_path)
+            catalog.delete(filename)
             print(f"Flight deleted: {filename}")
             return jsonify({"success": True})
         else:
@@ -428,97 +744,169 @@ def delete_flight(filename):
         print(f"Error deleting flight: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@socketio.on('connect')
+def handle_connect():
+    """Novi klijent dobija sensor_data dok se ne prijavi na telemetriju"""
+    with connected_lock:
+        connected_sids.add(request.sid)
+    join_room(LEGACY_ROOM)
+
+    # Proređena istorija do poslednjeg objavljenog merenja, pa sensor_data
+    until = state.live["seq"]
+    if until:
+        stride = max(1, round(telemetry.sample_rate / HISTORY_CONNECT_RATE))
+        emit('history', live_history.frame(until - live_history.capacity, sample_epoch,
+                                           until=until, stride=stride))
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    with connected_lock:
+        connected_sids.discard(request.sid)
+    telemetry.unsubscribe(request.sid)
+
+@socketio.on('subscribe')
+def handle_subscribe(options=None):
+    """Prijava na batch telemetriju (opcije u telemetry.py)"""
+    options = options or {}
+    try:
+        negotiated = telemetry.negotiate(options)
+        since = options.get('since')
+        since = None if since is None else int(since)
+    except (TypeError, ValueError, AttributeError):
+        emit('subscribed', {"error": "Invalid subscribe options"})
+        return
+
+    # Istorija se šalje pre prijave, pa telemetrija kreće tačno posle nje
+    last_seq = live_history.last_seq  # ne sample_seq: raste pre upisa u istoriju
+    if since is not None and epoch_anchor is not None:
+        frame = live_history.frame(since, sample_epoch, until=last_seq, stride=negotiated["stride"])
+        emit('history', telemetry.pack(frame, negotiated))
+    telemetry.subscribe(request.sid, options, last_seq)
+    leave_room(LEGACY_ROOM)
+    emit('subscribed', negotiated)
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe():
+    telemetry.unsubscribe(request.sid)
+    join_room(LEGACY_ROOM)
+
 @socketio.on('start_flight')
 def handle_start_flight():
     """WebSocket handler za pokretanje leta"""
-    global flight_recording, flight_stats, flight_start_time
-    
-    if not flight_recording:
-        flight_recording = True
-        flight_start_time = get_belgrade_time()
-        
-        # Reset statistike
-        flight_stats = {
-            "max_altitude": 0,
-            "min_altitude": float('inf'),
-            "max_climb_rate": 0,
-            "max_sink_rate": 0,
-            "data_points": 0,
-    	    "temp_sum": 0
-        }
-        
-        emit('flight_started', broadcast=True)
-        print(f"Flight started at {flight_start_time}")
+    begin_flight(get_belgrade_time())
 
 @socketio.on('stop_flight')
 def handle_stop_flight():
     """WebSocket handler za završetak leta"""
-    global flight_recording, flight_stats, flight_start_time
+    end_flight()
+
+def begin_flight(start_time):
+    """Započni snimanje (ručno ili automatski); vraća True ako je započeto"""
+    def open_track():
+        # Puna trasa leta ide u binarni fajl pored JSON statistika
+        os.makedirs(FLIGHTS_DIR, exist_ok=True)
+        return flight_track.TrackWriter(track_path_for(flight_filename(start_time)),
+                                        start_time.timestamp())
+
+    if not state.start_flight(start_time, open_track):
+        return False
+    socketio.emit('flight_started')
+    print(f"Flight started at {start_time}")
+    return True
+
+def auto_start_flight(takeoff_timestamp):
+    """Snimanje posle prepoznatog poletanja, od trenutka kada je pokret počeo.
+
+    Merenja od početka pokreta do prepoznavanja su već u ring buffer-u, pa
+    se upisuju u trasu pre sledećih.
+    """
+    start_time = datetime.datetime.fromtimestamp(sample_epoch(takeoff_timestamp), BELGRADE_TZ)
+    if begin_flight(start_time):
+        for reading in list(sample_buffer):
+            if reading.sample.timestamp >= takeoff_timestamp:
+                state.record(reading.sample, reading.altitude, reading.climb_rate)
+
+def end_flight(flight_end_time=None):
+    """Završi snimanje i sačuvaj let, ako je u toku"""
+    flight = state.stop_flight()
     
-    if flight_recording:
-        flight_recording = False
-        flight_end_time = get_belgrade_time()
-        duration = flight_end_time - flight_start_time
+    if flight is not None:
+        flight_end_time = flight_end_time or get_belgrade_time()
+        duration = flight_end_time - flight.start_time
         
         # Sačuvaj let
-        save_flight(flight_stats, flight_start_time, flight_end_time)
+        save_flight(flight.stats, flight.start_time, flight_end_time)
         
-        emit('flight_stopped', {
+        socketio.emit('flight_stopped', {
             'duration': str(duration).split('.')[0],
-            'data_points': flight_stats["data_points"]
-        }, broadcast=True)
+            'data_points': flight.stats["data_points"]
+        })
         
-        print(f"Flight stopped. Duration: {duration}, Data points: {flight_stats['data_points']}")
+        print(f"Flight stopped. Duration: {duration}, Data points: {flight.stats['data_points']}")
 
-def save_flight(stats, start_time, end_time):
-    """Sačuvaj let u JSON fajl - samo statistike"""
-    flights_dir = '/home/milaogi/flights'
-    os.makedirs(flights_dir, exist_ok=True)
+def flight_filename(start_time):
+    """Ime JSON fajla leta"""
+    return start_time.strftime('flight_%Y%m%d_%H%M%S.json')
+
+def track_path_for(filename):
+    """Putanja do binarne trase za dati JSON fajl leta"""
+    base, _ = os.path.splitext(filename)
+    return os.path.join(FLIGHTS_DIR, base + flight_track.TRACK_EXTENSION)
+
+def save_flight(stats, start_time, end_time, filename=None):
+    """Sačuvaj statistike leta u JSON fajl (trasa je već u .trk fajlu)"""
+    os.makedirs(FLIGHTS_DIR, exist_ok=True)
+    flight_path = os.path.join(FLIGHTS_DIR, filename or flight_filename(start_time))
+    record = flight_record(stats, start_time, end_time)
 
-    avg_temp = stats["temp_sum"] / stats["data_points"] if stats["data_points"] > 0 else 0
-    
-    flight_filename = start_time.strftime('flight_%Y%m%d_%H%M%S.json')
-    flight_path = os.path.join(flights_dir, flight_filename)
-    
-    # Sačuvaj samo korisne statistike
-    flight_record = {
-        'start_time': start_time.isoformat(),
-        'end_time': end_time.isoformat(), 
-        'duration_seconds': (end_time - start_time).total_seconds(),
-        'max_altitude': round(stats["max_altitude"], 1),
-        'min_altitude': round(stats["min_altitude"], 1),
-        'max_climb_rate': round(stats["max_climb_rate"], 1),
-        'max_sink_rate': round(stats["max_sink_rate"], 1),
-        'altitude_gain': round(stats["max_altitude"] - stats["min_altitude"], 1),
-        'avg_temperature': round(avg_temp, 1),
-        'data_points': stats["data_points"]
-    }
-    
     with open(flight_path, 'w') as f:
-        json.dump(flight_record, f, indent=2)
+        json.dump(record, f, indent=2)
+    catalog.upsert(os.path.basename(flight_path), record)
     
     print(f"Flight saved to {flight_path}")
 
-def update_flight_stats(data):
-    """Ažurira statistike leta"""
-    global flight_stats
-    
-    alt = data["altitude"]
-    climb = data["climb_rate"]
-    temp = data["temperature"]
-    
-    flight_stats["max_altitude"] = max(flight_stats["max_altitude"], alt)
-    flight_stats["min_altitude"] = min(flight_stats["min_altitude"], alt)
-    flight_stats["max_climb_rate"] = max(flight_stats["max_climb_rate"], climb)
-    flight_stats["max_sink_rate"] = min(flight_stats["max_sink_rate"], climb)
-    flight_stats["data_points"] += 1
-    
-    # Dodaj temperature tracking
-    if "temp_sum" not in flight_stats:
-        flight_stats["temp_sum"] = 0
-    flight_stats["temp_sum"] += temp
+def recover_flights():
+    """Posle pada napravi JSON statistike za trase koje nisu zatvorene"""
+    if not os.path.exists(FLIGHTS_DIR):
+        return
+
+    for filename in os.listdir(FLIGHTS_DIR):
+        if not filename.endswith(flight_track.TRACK_EXTENSION):
+            continue
+        track_path = os.path.join(FLIGHTS_DIR, filename)
+        json_filename = filename[:-len(flight_track.TRACK_EXTENSION)] + '.json'
+        if os.path.exists(os.path.join(FLIGHTS_DIR, json_filename)):
+            continue
+        start_time = state.flight_start_time
+        if start_time is not None and json_filename == flight_filename(start_time):
+            continue  # let koji se upravo snima
+
+        try:
+            flight_track.repair_track(track_path)
+            stats, start_epoch, end_epoch = flight_track.summarize_track(track_path)
+            start_time = datetime.datetime.fromtimestamp(start_epoch, BELGRADE_TZ)
+            end_time = datetime.datetime.fromtimestamp(end_epoch, BELGRADE_TZ)
+            save_flight(stats, start_time, end_time, json_filename)
+            print(f"Recovered unfinished flight {filename} ({stats['data_points']} data points)")
+        except Exception as e:
+            print(f"Error recovering flight {filename}: {e}")
+
+def startup_tasks():
+    """Posao pri startu koji ne treba da odloži prvo merenje i slušanje"""
+    recover_flights()
+    catalog.sync()
+    assets.compress()
+    boot.mark('startup_tasks')
+
+socketio.start_background_task(startup_tasks)
 
 if __name__ == '__main__':
     print("🌐 Variometer WebSocket server starting on http://192.168.4.1:5000")
     print("📱 Flutter app can connect to ws://192.168.4.1:5000")
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
+    port = int(os.environ.get('VARIO_PORT', '5000'))
+    print(f"Server mode: {ASYNC_MODE}")
+    boot.mark('serving')
+    if ASYNC_MODE == 'threading':
+        socketio.run(app, host='0.0.0.0', port=port, debug=False, allow_unsafe_werkzeug=True)
+    else:
+        socketio.run(app, host='0.0.0.0', port=port, debug=False)
@@ -45,7 +45,10 @@ class _VariometerHomePageState extends State<VariometerHomePage>
 
   bool isRecording = false;
 
+  static const int flightsPerPage = 50;
   List<dynamic> flights = [];
+  int flightsPage = 0; // poslednja učitana stranica /api/flights
+  int flightsTotal = 0;
 
   String get rpiAddress => isHotspotMode ? '192.168.4.1' : '192.168.67.251';
   bool isHotspotMode = true;
@@ -128,13 +131,17 @@ class _VariometerHomePageState extends State<VariometerHomePage>
     }
   }
 
-  Future<void> loadFlights() async {
+  Future<void> loadFlights({bool more = false}) async {
+    final page = more ? flightsPage + 1 : 1;
     try {
-      final response =
-          await http.get(Uri.parse('http://$rpiAddress:5000/api/flights'));
+      final response = await http.get(Uri.parse(
+          'http://$rpiAddress:5000/api/flights?page=$page&per_page=$flightsPerPage'));
       if (response.statusCode == 200) {
+        final result = json.decode(response.body);
         setState(() {
-          flights = json.decode(response.body);
+          flights = more ? flights + result['flights'] : result['flights'];
+          flightsPage = page;
+          flightsTotal = result['total'];
         });
       }
     } catch (e) {
@@ -487,25 +494,27 @@ class _VariometerHomePageState extends State<VariometerHomePage>
                     )
                   : ListView.builder(
                       padding: EdgeInsets.all(16),
-                      itemCount: flights.length,
+                      // Na kraju liste dugme za sledeću stranicu
+                      itemCount: flights.length +
+                          (flights.length < flightsTotal ? 1 : 0),
                       itemBuilder: (context, index) {
-                        final filename = flights[index];
-                        final parts =
-                            filename.replaceAll('.json', '').split('_');
-                        final date = parts.length > 1 ? parts[1] : '';
-                        final time = parts.length > 2 ? parts[2] : '';
-
-                        String formattedDate = '';
-                        String formattedTime = '';
-
-                        if (date.length == 8) {
-                          formattedDate =
-                              '${date.substring(0, 4)}-${date.substring(4, 6)}-${date.substring(6, 8)}';
-                        }
-                        if (time.length == 6) {
-                          formattedTime =
-                              '${time.substring(0, 2)}:${time.substring(2, 4)}:${time.substring(4, 6)}';
+                        if (index == flights.length) {
+                          return TextButton(
+                            onPressed: () => loadFlights(more: true),
+                            child: Text(
+                              'Učitaj još (${flights.length}/$flightsTotal)',
+                              style: TextStyle(color: Colors.green),
+                            ),
+                          );
                         }
+                        final flight = flights[index];
+                        final String filename = flight['filename'];
+                        // start_time je ISO sa beogradskom zonom
+                        final String startTime = flight['start_time'];
+                        final formattedDate = startTime.substring(0, 10);
+                        final formattedTime = startTime.substring(11, 19);
+                        final duration =
+                            (flight['duration_seconds'] / 60).round();
 
                         return Card(
                           color: Color(0xFF444444),
@@ -518,7 +527,7 @@ class _VariometerHomePageState extends State<VariometerHomePage>
                                   fontWeight: FontWeight.bold),
                             ),
                             subtitle: Text(
-                              'Klikni za detalje',
+                              '$duration min · max ${flight['max_altitude']?.toStringAsFixed(0)}m',
                               style: TextStyle(color: Colors.white70),
                             ),
                             onTap: () => showFlightDetails(filename),